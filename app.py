@@ -1,18 +1,40 @@
-
 import base64
-import joblib
-import pandas as pd
+import os
+import time
+
+from utils import startup
+
+# Time every import below when NISR_PROFILE_STARTUP=1
+startup.install()
+
 from dash import Dash, html, dcc, Input, Output, State
 import dash_bootstrap_components as dbc
 
 
 from layouts import stunting, mal
 from layouts.recommendations import get_recommendations_layout
-from layouts.model import get_layout as get_layout_model, FEATURES
+from layouts.model import get_layout as get_layout_model, register_callbacks_model, FEATURES
 from layouts.overview import get_layout_overview
-from layouts.hotspot import get_layout as get_layout_hotspot
+from layouts.hotspot import get_layout as get_layout_hotspot, hotspot_figure, register_callbacks_hotspot
 
 from chatbot import chatbot_btn, chatbot_box, register_callbacks
+from utils.batch_predict import read_table, register_batch_route, score_frame
+from utils.chat_history import ChatHistory, register_chat_route
+from utils.compression import register_compression
+from utils.layout_cache import LayoutCache, data_version, register_layout_cache_route
+from utils.metrics import ENABLED as METRICS_ENABLED, Metrics, register_metrics
+from utils.model_registry import get_model, model_version, register_model_route
+from utils.normalize import get_normalized
+from utils.prediction_cache import PREPOPULATE, PredictionCache, register_cache_route, rows_from_data
+from utils.query_index import get_query_index
+from utils.small_area import MODES
+from utils.static_files import register_path, register_static_route, static_url
+from utils.survey import get_estimator
+
+# Set by gunicorn.conf.py when the app is loaded once in the master before forking
+PRELOAD = os.environ.get("NISR_PRELOAD", "0") == "1"
+
+startup.mark("imports")
 
 
 app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP], suppress_callback_exceptions=True)
@@ -20,29 +42,37 @@ server = app.server
 app.title = "Rwanda Malnutrition Dashboard"
 
 
-register_callbacks(app, FEATURES)
+# Chat transcripts stay on the server; the browser only holds a session id
+chat_history = ChatHistory()
+register_callbacks(app, FEATURES, chat_history)
 
 
-MODEL_PATH = "assets/best_stunting_model_hgb_no_impute.joblib"
 LOGO_PATH = "assets/nisr_logo.png"
 
-try:
-    clf = joblib.load(MODEL_PATH)
-    print("✅ Model loaded successfully!")
-except Exception as e:
-    print(f"⚠️ Error loading model: {e}")
-    clf = None
+# One prediction cache and one layout cache per worker, shared by every callback
+prediction_cache = PredictionCache(FEATURES)
+layout_cache = LayoutCache()
+
+
+def warm_model():
+    """Load, compile and warm the model, then fill the prediction cache."""
+    if get_model("stunting") is None:
+        return
+    if PREPOPULATE:
+        rows = rows_from_data(get_normalized("df_clean"), FEATURES)
+        prediction_cache.prepopulate(get_model("stunting", compiled=True), model_version("stunting"), rows)
 
+# Served from a versioned, cacheable URL instead of inlined into every page
 try:
-    with open(LOGO_PATH, 'rb') as f:
-        logo_data = base64.b64encode(f.read()).decode()
-except Exception:
-    logo_data = ""
+    register_path("nisr_logo.png", LOGO_PATH, "image/png")
+    logo_src = static_url("nisr_logo.png")
+except OSError:
+    logo_src = None
 
 
 navbar = dbc.Navbar(
     dbc.Container([
-        html.Div([html.Img(src=f'data:image/png;base64,{logo_data}' if logo_data else None,
+        html.Div([html.Img(src=logo_src,
                            style={"height": "45px", "width": "auto"})],
                  className="d-flex align-items-center"),
         html.Div([
@@ -77,30 +107,71 @@ app.layout = html.Div([
     html.Div(id="page-content"),
     chatbot_btn,
     chatbot_box,
-    dcc.Store(id="scroll-trigger", data=0),
     html.Div(id="scroll-dummy", style={"display": "none"})
 ])
 
+PAGES = {
+    "/overview": get_layout_overview,
+    "/hotspot": get_layout_hotspot,
+    "/model": get_layout_model,
+    "/stunting": stunting.get_layout,
+    "/recommendations": lambda: recommendations_layout,
+}
+
+
+# Datasets each page is built from; these pages are served from layout_cache
+# until one of them changes. /model shows the live model version and
+# /recommendations is static, so both are built directly.
+PAGE_SOURCES = {
+    "/overview": ["nisr"],
+    "/hotspot": ["nisr"],
+    "/stunting": ["df_clean"],
+}
+
+
+def build_page(pathname):
+    page = PAGES.get(pathname)
+    if page is None:
+        return html.Div([
+            html.H2("Welcome to Rwanda Malnutrition Dashboard"),
+            html.P("Explore insights: Overview, Hotspots, Models, and Recommendations.")
+        ], style={"padding": "20px"})
+    sources = PAGE_SOURCES.get(pathname)
+    if sources is None:
+        return page()
+    return layout_cache.get_or_build(pathname, None, data_version(sources), page)
+
+
 @app.callback(
     Output("page-content", "children"),
     Input("url", "pathname")
 )
 def render_page(pathname):
-    if pathname == "/overview":
-        return get_layout_overview()
-    elif pathname == "/hotspot":
-        return get_layout_hotspot()
-    elif pathname == "/model":
-        return get_layout_model()
-    elif pathname == "/stunting":
-        return stunting.get_layout()
-    elif pathname == "/recommendations":
-        return recommendations_layout
-    else:
-        return html.Div([
-            html.H2("Welcome to Rwanda Malnutrition Dashboard"),
-            html.P("Explore insights: Overview, Hotspots, Models, and Recommendations.")
-        ], style={"padding": "20px"})
+    return build_page(pathname)
+
+
+def warm_pages():
+    """Render every page (and each hotspot mode) once into the layout cache.
+
+    This also loads plotly's validators, which the first figure built from
+    scratch would otherwise pay for.
+    """
+    for pathname in PAGES:
+        build_page(pathname)
+    for mode in MODES:
+        layout_cache.get_or_build("/hotspot", {"mode": mode}, data_version(["nisr"]),
+                                  lambda: hotspot_figure(mode))
+
+
+# Nothing heavy runs at import: each page builds its data on first use, and
+# these steps build it ahead of the first visitor
+WARM_UP_TASKS = [
+    ("datasets", lambda: [get_normalized(source) for source in ("nisr", "df_clean")]),
+    ("survey designs", lambda: [get_estimator(source) for source in ("nisr", "df_clean")]),
+    ("chat index", get_query_index),
+    ("pages", warm_pages),
+    ("model", warm_model),
+]
 
 
 @app.callback(
@@ -110,23 +181,73 @@ def render_page(pathname):
     prevent_initial_call=True
 )
 def predict_stunting(n_clicks, *values):
+    clf = get_model("stunting", compiled=True)
     if n_clicks is None or clf is None:
         return ""
-    input_dict = {f: [v] for f, v in zip(FEATURES, values)}
-    input_df = pd.DataFrame(input_dict)
-    numeric_features = ['wealth_index', 'mother_bmi', 'child_current_age_months_b19']
-    for col in numeric_features:
-        if col in input_df.columns:
-            input_df[col] = pd.to_numeric(input_df[col], errors='coerce')
     try:
-        prob = clf.predict_proba(input_df)[:, 1][0]
+        prob = prediction_cache.predict(clf, model_version("stunting"), values)
         return f"Predicted Stunting Probability: {prob*100:.2f}%"
     except Exception as e:
         return f"Error predicting: {e}"
 
 
+@app.callback(
+    Output("batch-download", "data"),
+    Output("batch-output", "children"),
+    Input("batch-upload", "contents"),
+    State("batch-upload", "filename"),
+    prevent_initial_call=True
+)
+def predict_batch_upload(contents, filename):
+    clf = get_model("stunting", compiled=True)
+    if not contents or clf is None:
+        return None, "⚠️ Model not loaded properly." if contents else ""
+    try:
+        data = base64.b64decode(contents.split(",", 1)[1])
+        df = read_table(data, filename)
+        start = time.perf_counter()
+        scored = score_frame(clf, df, FEATURES)
+        elapsed = time.perf_counter() - start
+    except Exception as e:
+        return None, f"⚠️ Could not score {filename}: {e}"
+    stem = os.path.splitext(filename or "batch")[0]
+    rate = len(scored) / elapsed if elapsed > 0 else float("inf")
+    return (
+        dcc.send_data_frame(scored.to_csv, f"{stem}_scored.csv", index=False),
+        f"✅ Scored {len(scored):,} rows in {elapsed:.2f}s ({rate:,.0f} rows/s)."
+    )
+
+
+register_batch_route(server, lambda: get_model("stunting", compiled=True), FEATURES)
+register_model_route(server)
+register_cache_route(server, prediction_cache)
+register_layout_cache_route(server, layout_cache)
+register_chat_route(server, chat_history)
+register_static_route(server)
+register_compression(server)
+
+
+register_callbacks_model(app)
+register_callbacks_hotspot(app, layout_cache)
 stunting.register_callbacks_stunting(app)
 
+# Last, so every callback above is timed
+if METRICS_ENABLED:
+    metrics = Metrics()
+    metrics.add_stats("layout", layout_cache.stats)
+    metrics.add_stats("prediction", prediction_cache.stats)
+    metrics.add_stats("chat_history", chat_history.stats)
+    register_metrics(app, metrics)
+
+startup.mark("app, layout and callbacks")
+
+# Under preload the master must finish before forking (and start no threads);
+# otherwise warm up in the background while the server starts accepting requests
+startup.warm_up(WARM_UP_TASKS, background=not PRELOAD)
+if PRELOAD:
+    startup.mark("warm-up")
+startup.report()
+
 
 if __name__ == "__main__":
     app.run(debug=False)
@@ -0,0 +1,41 @@
+// Callbacks that only change what is on screen run in the browser, with no
+// round trip to the server. Registered in Python with ClientsideFunction("ui", name).
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    ui: {
+        toggle_chat: function (n_clicks, style) {
+            const next = Object.assign({}, style || {display: "none"});
+            next.display = next.display === "none" ? "block" : "none";
+            return next;
+        },
+
+        // `summary` is the stunting-selection store the page ships with
+        // (and the filter callback refreshes)
+        display_click_info: function (clickData, summary) {
+            if (!clickData || !summary) {
+                return "";
+            }
+            const label = clickData.points[0].label;
+            let count, weighted;
+            if (label === "Stunted") {
+                count = summary.stunted;
+                weighted = summary.weighted_rate;
+            } else {
+                count = summary.total - summary.stunted;
+                weighted = 100 - summary.weighted_rate;
+            }
+            return label + " children: " + count.toLocaleString("en-US") +
+                " (" + weighted.toFixed(1) + "% weighted)";
+        },
+
+        // Keep the newest chat message in view once it has been rendered
+        scroll_chat: function (messages) {
+            window.requestAnimationFrame(function () {
+                const box = document.getElementById("chat-messages");
+                if (box) {
+                    box.scrollTop = box.scrollHeight;
+                }
+            });
+            return window.dash_clientside.no_update;
+        }
+    }
+});
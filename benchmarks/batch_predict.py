@@ -0,0 +1,60 @@
+"""Throughput of batch stunting prediction in rows per second.
+
+Scores synthetic cluster lists resampled from assets/df_clean.csv, both
+directly through utils.batch_predict.score_frame and end to end through the
+/api/predict/batch route with the Flask test client.
+
+    python -m benchmarks.batch_predict [--rows 1000 10000 100000]
+"""
+import argparse
+import time
+
+from flask import Flask
+
+from layouts.model import FEATURES
+from utils.batch_predict import register_batch_route, score_frame
+from utils.data_registry import get_dataset
+from utils.model_registry import get_model
+
+
+def sample_rows(n, seed=0):
+    return get_dataset("df_clean")[FEATURES].sample(n, replace=True, random_state=seed).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[1000, 5000, 20000])
+    args = parser.parse_args()
+
+    clf = get_model("stunting")
+    server = Flask(__name__)
+    register_batch_route(server, lambda: clf, FEATURES)
+    client = server.test_client()
+
+    print(f"{'rows':>8}{'chunk':>8}{'score_frame rows/s':>20}{'HTTP rows/s':>14}")
+    for n in args.rows:
+        df = sample_rows(n)
+        body = df.to_csv(index=False).encode()
+        for chunk_size in args.chunk_size:
+            start = time.perf_counter()
+            score_frame(clf, df, FEATURES, chunk_size)
+            direct = n / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            resp = client.post("/api/predict/batch?filename=bench.csv", data=body,
+                               content_type="text/csv")
+            resp.get_data()
+            http = n / (time.perf_counter() - start)
+            print(f"{n:>8,}{chunk_size:>8,}{direct:>20,.0f}{http:>14,.0f}")
+
+    # One row per call, as the /model page does today
+    row = sample_rows(200)
+    start = time.perf_counter()
+    for i in range(len(row)):
+        clf.predict_proba(row.iloc[[i]])
+    print(f"single-row predict_proba: {len(row) / (time.perf_counter() - start):,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Chatbot reply latency over a fixed set of data questions.
+
+Builds the query index once (reported separately), then answers each
+question `--repeat` times through chatbot.reply and reports the median and
+95th percentile per question and over the whole set. Every answer is a
+lookup in the precomputed index; none touches the raw CSVs.
+
+    python -m benchmarks.chatbot_queries [--repeat 200] [--show]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from chatbot import reply
+from layouts.model import FEATURES
+from utils.cube import get_cube
+from utils.query_index import get_query_index
+
+QUESTIONS = [
+    "stunting rate in Musanze",
+    "wasting among girls 12-23 months",
+    "top 5 districts by underweight",
+    "lowest 3 districts for stunting",
+    "which regions have the highest stunting",
+    "stunting by wealth",
+    "stunting among boys under 2 in the northern province",
+    "underweight among the poorest children in Nyaruguru",
+    "malnutrition in Nyarugenge and Gasabo",
+    "wasting by age",
+    "stunting in Musanzi",
+    "what is the wealth index",
+    "hello",
+    "tell me something",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--show", action="store_true", help="print each answer")
+    args = parser.parse_args()
+
+    get_cube("nisr")
+    start = time.perf_counter()
+    get_query_index()
+    print(f"index build: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    print(f"{'question':<56}{'p50 ms':>9}{'p95 ms':>9}")
+    everything = []
+    for question in QUESTIONS:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            answer = reply(question, FEATURES)
+            timings.append((time.perf_counter() - start) * 1000)
+        everything.extend(timings)
+        print(f"{question:<56}{np.percentile(timings, 50):>9.3f}{np.percentile(timings, 95):>9.3f}")
+        if args.show:
+            print("    " + answer.replace("\n", "\n    "))
+    print(f"{'all questions':<56}{np.percentile(everything, 50):>9.3f}{np.percentile(everything, 95):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Compiled NumPy predictor vs scikit-learn predict_proba.
+
+Checks that both agree on the bundled data and on threshold-probing inputs,
+then compares single-row latency and batch throughput.
+
+    python -m benchmarks.compiled_model [--rows 1000 10000 100000]
+"""
+import argparse
+import statistics
+import time
+
+from layouts.model import FEATURES
+from utils.compiled_model import compile_model, probe_inputs, verify
+from utils.data_registry import get_dataset
+from utils.model_registry import get_model
+
+
+def latency_us(fn, X, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    clf = get_model("stunting")
+    start = time.perf_counter()
+    compiled = compile_model(clf)
+    print(f"compile: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    data = get_dataset("df_clean")[FEATURES]
+    print(f"max |diff| on df_clean:      {verify(compiled, clf, data):.3g}")
+    print(f"max |diff| on probe inputs:  {verify(compiled, clf, probe_inputs(compiled, 20000)):.3g}")
+
+    row = data.iloc[[0]]
+    print(f"\n{'single row':<28}{'sklearn us':>12}{'compiled us':>14}")
+    print(f"{'DataFrame input':<28}{latency_us(clf.predict_proba, row, args.repeat):>12.0f}"
+          f"{latency_us(compiled.predict_proba, row, args.repeat):>14.0f}")
+    print(f"{'ndarray input (compiled)':<28}{'':>12}"
+          f"{latency_us(compiled.predict_proba, row.to_numpy(float), args.repeat):>14.0f}")
+
+    print(f"\n{'batch rows':<12}{'sklearn rows/s':>16}{'compiled rows/s':>17}")
+    for n in args.rows:
+        X = data.sample(n, replace=True, random_state=0)
+        rates = [n / (latency_us(fn, X, 3) / 1e6) for fn in (clf.predict_proba, compiled.predict_proba)]
+        print(f"{n:<12,}{rates[0]:>16,.0f}{rates[1]:>17,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Payload size and render time of the hotspot choropleth.
+
+Compares the original per-request path (read GeoJSON, merge on lower-cased
+names, inline the full-resolution ``__geo_interface__``) with the cached,
+simplified geometry from utils.geometry at each tolerance.
+
+    python -m benchmarks.hotspot_geometry [--repeat 5]
+"""
+import argparse
+import statistics
+import time
+
+import geopandas as gpd
+import plotly.express as px
+
+from utils import geometry
+from utils.cube import get_cube
+from utils.districts import DISTRICT_MAP
+
+
+def district_rates():
+    rates = get_cube("nisr").rate("stunted", by="district").rename_axis("district_code")
+    rates = rates.reset_index(name="stunting_rate")
+    rates["district_name"] = rates["district_code"].map(DISTRICT_MAP)
+    return rates
+
+
+def render_uncached(rates):
+    gdf = gpd.read_file(geometry.GEOJSON_PATH)
+    if gdf.crs is None:
+        gdf = gdf.set_crs("EPSG:4326")
+    rates = rates.assign(district_name_clean=rates["district_name"].str.strip().str.lower())
+    gdf["shapeName_clean"] = gdf["shapeName"].str.strip().str.lower()
+    gdf = gdf.merge(rates, left_on="shapeName_clean", right_on="district_name_clean", how="left")
+    fig = px.choropleth_map(
+        gdf, geojson=gdf.__geo_interface__, locations="district_name_clean",
+        featureidkey="properties.shapeName_clean", color="stunting_rate",
+        hover_name="district_name", hover_data={"stunting_rate": True},
+    )
+    return fig.to_json()
+
+
+def render_cached(rates, detail):
+    fig = px.choropleth_map(
+        rates, geojson=geometry.district_geojson(detail), locations="district_code",
+        color="stunting_rate", hover_name="district_name",
+        hover_data={"stunting_rate": True, "district_code": False},
+    )
+    return fig.to_json()
+
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = fn()
+        times.append(time.perf_counter() - start)
+    return len(payload.encode()), statistics.median(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rates = district_rates()
+    rows = [("uncached (before)",) + measure(lambda: render_uncached(rates), args.repeat)]
+    for detail in geometry.TOLERANCES:
+        start = time.perf_counter()
+        geometry.district_geojson(detail)
+        build_ms = (time.perf_counter() - start) * 1000
+        size, ms = measure(lambda: render_cached(rates, detail), args.repeat)
+        rows.append((f"cached {detail} (build {build_ms:.0f} ms)", size, ms))
+
+    print(f"{'variant':<34}{'payload bytes':>15}{'render ms':>12}")
+    for name, size, ms in rows:
+        print(f"{name:<34}{size:>15,}{ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
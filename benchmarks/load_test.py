@@ -0,0 +1,232 @@
+"""Load test: scripted dashboard sessions against a local gunicorn, per-endpoint latency.
+
+Each virtual user replays sessions back to back for --duration seconds,
+posting to /_dash-update-component exactly as the browser does: it opens
+all five pages (render_page), switches the hotspot map mode, filters the
+stunting page by a district, scores a child sampled from df_clean on the
+model page (predict_stunting) and asks the chatbot a greeting and a data
+question (handle_message, carrying its chat-session store). Request
+bodies are built from the server's /_dash-dependencies, so they match the
+callbacks actually registered.
+
+For every gunicorn configuration (WORKERSxTHREADS) a server is started on
+a free local port with gunicorn.conf.py, one untimed session per user
+warms it, and each concurrency level is then measured in turn. The report
+gives throughput and p50/p95/p99 latency per endpoint and overall; compare
+rows to size workers and threads and to spot where latency climbs faster
+than throughput (a scaling cliff).
+
+    python -m benchmarks.load_test [--configs 1x1 2x1 2x4] [--concurrency 1 4 16]
+        [--duration 20] [--think 0]
+    python -m benchmarks.load_test --url http://127.0.0.1:8050 [--concurrency 8]
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+from benchmarks.chatbot_queries import QUESTIONS
+from benchmarks.worker_memory import free_port, wait_ready
+from layouts.model import FEATURES
+from utils.data_registry import BASE_DIR, get_dataset
+from utils.districts import DISTRICT_MAP
+from utils.small_area import MODES
+
+# Callbacks are addressed by their first output component
+RENDER, HOTSPOT, STUNTING, PREDICT, CHAT = "page-content", "hotspot-map", "stunting-pie", "prediction-output", "chat-messages"
+
+
+class Client:
+    """Dash callback requests for one server, built from its dependency list."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        with urllib.request.urlopen(f"{self.base_url}/_dash-dependencies", timeout=60) as response:
+            dependencies = json.loads(response.read())
+        self.callbacks = {}
+        for dependency in dependencies:
+            if dependency.get("clientside_function"):
+                continue
+            outputs = [self._split(output) for output in dependency["output"].strip(".").split("...")]
+            self.callbacks.setdefault(outputs[0][0], (dependency, outputs))
+
+    @staticmethod
+    def _split(output):
+        # "stunting-click-info.children@<hash>": allow_duplicate outputs carry a suffix
+        id, prop = output.rsplit(".", 1)
+        return id, prop.split("@")[0]
+
+    def body(self, callback, values):
+        """Request body for `callback`; `values` maps "id.property" to input/state values."""
+        dependency, outputs = self.callbacks[callback]
+        inputs = [{**item, "value": values.get(f"{item['id']}.{item['property']}")} for item in dependency["inputs"]]
+        return {
+            "output": dependency["output"],
+            "outputs": ([{"id": id, "property": prop} for id, prop in outputs] if len(outputs) > 1
+                        else {"id": outputs[0][0], "property": outputs[0][1]}),
+            "inputs": inputs,
+            "changedPropIds": [f"{inputs[0]['id']}.{inputs[0]['property']}"],
+            "state": [{**item, "value": values.get(f"{item['id']}.{item['property']}")}
+                      for item in dependency.get("state", [])],
+        }
+
+    def post(self, callback, values):
+        """(seconds, status, response JSON or None)."""
+        request = urllib.request.Request(
+            f"{self.base_url}/_dash-update-component", data=json.dumps(self.body(callback, values)).encode(),
+            headers={"Content-Type": "application/json", "Accept-Encoding": "gzip"},
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                data = response.read()
+                status, encoding = response.status, response.headers.get("Content-Encoding")
+        except urllib.error.HTTPError as e:
+            return time.perf_counter() - start, e.code, None
+        except OSError:
+            return time.perf_counter() - start, 0, None
+        elapsed = time.perf_counter() - start
+        if status != 200:
+            return elapsed, status, None
+        return elapsed, status, json.loads(gzip.decompress(data) if encoding == "gzip" else data)
+
+
+def session(client, rng, rows, record, think=0.0):
+    """One scripted visit; `record(endpoint, seconds, status)` gets every request."""
+    chat = None
+
+    def step(endpoint, callback, values):
+        elapsed, status, response = client.post(callback, values)
+        record(endpoint, elapsed, status)
+        if think:
+            time.sleep(rng.uniform(0, 2 * think))
+        return response
+
+    def ask(message):
+        nonlocal chat
+        response = step("handle_message", CHAT, {"send-btn.n_clicks": 1, "chat-input.value": message,
+                                                 "chat-session.data": chat})
+        if response:
+            chat = response["response"]["chat-session"]["data"]
+
+    step("render_page", RENDER, {"url.pathname": "/overview"})
+    ask(rng.choice(["hello", "hi", "hey"]))
+    step("render_page", RENDER, {"url.pathname": "/hotspot"})
+    step("update_hotspot_map", HOTSPOT, {"hotspot-rate-mode.value": rng.choice(list(MODES))})
+    step("render_page", RENDER, {"url.pathname": "/model"})
+    row = rows[rng.randrange(len(rows))]
+    step("predict_stunting", PREDICT, {"predict-btn.n_clicks": 1,
+                                       **{f"input-{f}.value": v for f, v in zip(FEATURES, row)}})
+    step("render_page", RENDER, {"url.pathname": "/stunting"})
+    step("filter_stunting", STUNTING, {"stunting-filter-district.value": [rng.choice(list(DISTRICT_MAP))]})
+    ask(rng.choice(QUESTIONS))
+    step("render_page", RENDER, {"url.pathname": "/recommendations"})
+
+
+def sample_rows(n=500, seed=0):
+    df = get_dataset("df_clean")[FEATURES].sample(n, replace=True, random_state=seed)
+    return [[value.item() if hasattr(value, "item") else value for value in row] for row in df.itertuples(index=False)]
+
+
+def load(client, users, duration, rows, think):
+    """Run `users` closed-loop virtual users for `duration` seconds."""
+    samples = {}
+    lock = threading.Lock()
+
+    def record(endpoint, seconds, status):
+        with lock:
+            samples.setdefault(endpoint, []).append((seconds, status))
+
+    deadline = time.perf_counter() + duration
+
+    def user(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            session(client, rng, rows, record, think)
+
+    threads = [threading.Thread(target=user, args=(seed,)) for seed in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def report(label, samples, elapsed):
+    print(f"  {label}")
+    print(f"    {'endpoint':<20}{'requests':>9}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    endpoints = sorted(samples.items())
+    endpoints.append(("all", [sample for _, values in endpoints for sample in values]))
+    for endpoint, values in endpoints:
+        ms = np.array([seconds for seconds, _ in values]) * 1000
+        errors = sum(1 for _, status in values if status != 200)
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (np.nan,) * 3
+        print(f"    {endpoint:<20}{len(values):>9}{len(values) / elapsed:>9.1f}{p50:>9.1f}{p95:>9.1f}{p99:>9.1f}{errors:>8}")
+
+
+def warm_up(client, users, rows):
+    """One untimed session per user, so every worker has loaded its caches."""
+    threads = [threading.Thread(target=session, args=(client, random.Random(-1 - seed), rows, lambda *a: None))
+               for seed in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def run_levels(base_url, levels, duration, rows, think):
+    client = Client(base_url)
+    warm_up(client, max(levels), rows)
+    for users in levels:
+        samples, elapsed = load(client, users, duration, rows, think)
+        report(f"{users} concurrent users, {elapsed:.1f}s", samples, elapsed)
+
+
+def start_server(workers, threads):
+    port = free_port()
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), GUNICORN_THREADS=str(threads), PORT=str(port))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", "app:server"],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    wait_ready(port, process)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--configs", nargs="+", default=["1x1", "2x1", "2x4"], help="gunicorn WORKERSxTHREADS")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16], help="virtual users")
+    parser.add_argument("--duration", type=float, default=20, help="seconds per concurrency level")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between a user's requests, seconds")
+    parser.add_argument("--url", help="test a server that is already running instead")
+    args = parser.parse_args()
+
+    rows = sample_rows()
+    if args.url:
+        print(f"{args.url}")
+        run_levels(args.url, args.concurrency, args.duration, rows, args.think)
+        return
+    for config in args.configs:
+        workers, threads = (int(part) for part in config.split("x"))
+        process, base_url = start_server(workers, threads)
+        try:
+            print(f"gunicorn {workers} workers x {threads} threads")
+            run_levels(base_url, args.concurrency, args.duration, rows, args.think)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
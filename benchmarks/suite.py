@@ -0,0 +1,340 @@
+"""Benchmark suite for page layouts, callbacks and loaders, checked against JSON baselines.
+
+Every case runs in a fresh subprocess with an empty temporary dataset
+cache (NISR_CACHE_DIR) and, unless --artifacts is given, with the offline
+build switched off (NISR_USE_ARTIFACTS=0), so its first ("cold") call
+parses the bundled CSVs exactly as a new worker on a clean checkout would;
+the "warm" figure is the median of --repeat further calls. For each case
+the suite records:
+
+    cold_ms, warm_ms   wall time of the first call and the warm median
+    cold_rss_kb        peak resident memory added by the first call
+    warm_peak_kb       peak traced allocations of one warm call
+    bytes              size of the result: response body for test-client
+                       cases, plotly JSON for layouts, deep frame size for
+                       data frames
+
+--save writes the results as a baseline; otherwise they are compared with
+the baseline and the run fails (exit 1) when a metric grows by more than
+--threshold and by more than its absolute floor, so timer noise on
+sub-millisecond calls does not fail a build. Cold metrics (one sample,
+including first imports) are held to at least COLD_THRESHOLD. The
+baseline records the environment it was measured in: a run with other
+settings (e.g. --artifacts against a CSV baseline) is refused rather than
+compared, and on another machine, or with another --repeat, only the
+machine-independent metrics (memory, bytes) are compared.
+
+Timings are only meaningful against a run on the same machine in the same
+session: --reference REF measures every case at a git ref (checked out in
+a temporary worktree) alternately with the working tree, and gates on the
+difference instead of the baseline.
+
+    python -m benchmarks.suite [--save] [--baseline benchmarks/baseline.json]
+        [--threshold 0.25] [--repeat 20] [--artifacts] [--case NAME ...]
+    python -m benchmarks.suite --reference origin/main [--case NAME ...]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+METRICS = ("cold_ms", "warm_ms", "cold_rss_kb", "warm_peak_kb", "bytes")
+# Only comparable between runs on the same machine with the same --repeat
+TIMINGS = ("cold_ms", "warm_ms")
+# Growth below these is noise, whatever the relative change
+FLOORS = {"cold_ms": 50.0, "warm_ms": 2.0, "cold_rss_kb": 4096, "warm_peak_kb": 256, "bytes": 0}
+# Smallest relative growth that fails a cold metric, whatever --threshold is
+COLD_METRICS = ("cold_ms", "cold_rss_kb")
+COLD_THRESHOLD = 0.5
+# Baseline key holding the settings and machine the cases ran with
+ENVIRONMENT = "_environment"
+SETTINGS = ("NISR_USE_ARTIFACTS", "NISR_CACHE_DIR")
+
+
+def layout_bytes(layout):
+    from plotly.io.json import to_json_plotly
+    return len(to_json_plotly(layout))
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def response_bytes(response):
+    assert response.status_code == 200, response.status_code
+    return len(response.get_data())
+
+
+def client_call(output, inputs, state=()):
+    """A Dash callback request through the Flask test client."""
+    from app import server
+    client = server.test_client()
+    body = {
+        "output": output,
+        "outputs": {"id": output.split(".")[0], "property": output.split(".")[1]},
+        "inputs": [{"id": id, "property": prop, "value": value} for id, prop, value in inputs],
+        "changedPropIds": [f"{inputs[0][0]}.{inputs[0][1]}"],
+        "state": [{"id": id, "property": prop, "value": value} for id, prop, value in state],
+    }
+    return lambda: client.post("/_dash-update-component", json=body)
+
+
+def render_page(pathname):
+    return client_call("page-content.children", [("url", "pathname", pathname)])
+
+
+def predict_stunting():
+    from layouts.model import FEATURES
+    from utils.data_registry import get_dataset
+    row = get_dataset("df_clean")[FEATURES].iloc[0]
+    values = [value.item() if hasattr(value, "item") else value for value in row]
+    return client_call("prediction-output.children", [("predict-btn", "n_clicks", 1)],
+                       [(f"input-{f}", "value", v) for f, v in zip(FEATURES, values)])
+
+
+def overview_layout():
+    from layouts.overview import get_layout_overview
+    return get_layout_overview
+
+
+def hotspot_layout():
+    from layouts.hotspot import get_layout
+    return get_layout
+
+
+def stunting_layout():
+    from layouts.stunting import get_layout
+    return get_layout
+
+
+def load_nutrition_data():
+    from utils.data_registry import resolve_path
+    from utils.plots import load_nutrition_data
+    # A CSV path, not a registry name: always the typed read and normalization
+    path = resolve_path("children_nutrition")
+    return lambda: load_nutrition_data(path)
+
+
+def factor_importance():
+    from layouts.stunting import calculate_factor_importance
+    from utils.normalize import get_normalized
+    df = get_normalized("df_clean")
+    return lambda: calculate_factor_importance(df)
+
+
+def importance_bytes(importance_df):
+    return len(importance_df.to_json())
+
+
+# name -> (setup returning the call to time, size of its result)
+CASES = {
+    "overview.get_layout_overview": (overview_layout, layout_bytes),
+    "hotspot.get_layout": (hotspot_layout, layout_bytes),
+    "stunting.get_layout": (stunting_layout, layout_bytes),
+    "app.predict_stunting": (predict_stunting, response_bytes),
+    "render /overview": (lambda: render_page("/overview"), response_bytes),
+    "render /hotspot": (lambda: render_page("/hotspot"), response_bytes),
+    "render /stunting": (lambda: render_page("/stunting"), response_bytes),
+    "plots.load_nutrition_data": (load_nutrition_data, frame_bytes),
+    "stunting.calculate_factor_importance": (factor_importance, importance_bytes),
+}
+
+
+def measure(name, repeat):
+    """Run one case in this process and print its numbers as JSON."""
+    setup, size = CASES[name]
+    call = setup()
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    result = call()
+    cold = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(json.dumps({
+        "cold_ms": round(cold * 1000, 2),
+        "warm_ms": round(statistics.median(timings) * 1000, 3),
+        "cold_rss_kb": rss_after - rss_before,
+        "warm_peak_kb": round(peak / 1024, 1),
+        "bytes": size(result),
+    }))
+
+
+def machine():
+    """CPU model and count plus Python version: what timings depend on."""
+    model = platform.processor() or platform.machine()
+    try:
+        with open("/proc/cpuinfo") as f:
+            model = next((line.split(":", 1)[1].strip() for line in f if line.startswith("model name")), model)
+    except OSError:
+        pass
+    return f"{model}, {os.cpu_count()} CPUs, Python {platform.python_version()}"
+
+
+def environment(artifacts, repeat):
+    """Settings and machine every case runs with; stored in the baseline to compare like with like."""
+    return {"NISR_USE_ARTIFACTS": "1" if artifacts else "0", "NISR_CACHE_DIR": "empty temporary directory",
+            "machine": machine(), "repeat": repeat}
+
+
+def run(name, repeat, artifacts=False, tree=BASE_DIR):
+    """Measure one case in a fresh subprocess, importing the app from `tree`."""
+    # Pages are built on demand in the subprocess, not by the warm-up thread,
+    # and nothing is read from a cache left behind by an earlier run
+    with tempfile.TemporaryDirectory(prefix="nisr-bench-") as cache_dir:
+        env = dict(os.environ, NISR_WARM_UP="0", NISR_CACHE_DIR=cache_dir, PYTHONPATH=tree,
+                   NISR_USE_ARTIFACTS="1" if artifacts else "0")
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", name, "--repeat", str(repeat)],
+                             capture_output=True, text=True, env=env, cwd=tree, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def worktree(ref):
+    """A temporary detached checkout of `ref`; remove it with remove_worktree."""
+    path = tempfile.mkdtemp(prefix="nisr-bench-ref-")
+    subprocess.run(["git", "worktree", "add", "--detach", path, ref], cwd=BASE_DIR, check=True,
+                   capture_output=True)
+    return path
+
+
+def remove_worktree(path):
+    subprocess.run(["git", "worktree", "remove", "--force", path], cwd=BASE_DIR, capture_output=True)
+
+
+def regressions(results, baseline, threshold, metrics=METRICS):
+    """(case, metric, baseline, current) for every metric past the threshold."""
+    found = []
+    for name, current in results.items():
+        for metric in metrics:
+            before = baseline.get(name, {}).get(metric)
+            if before is None:
+                continue
+            now = current[metric]
+            allowed = max(threshold, COLD_THRESHOLD) if metric in COLD_METRICS else threshold
+            if now > before * (1 + allowed) and now - before > FLOORS[metric]:
+                found.append((name, metric, before, now))
+    return found
+
+
+def header():
+    return f"{'case':<38}" + "".join(f"{metric:>14}" for metric in METRICS)
+
+
+def row(name, values):
+    return f"{name:<38}" + "".join(f"{values[metric]:>14,}" for metric in METRICS)
+
+
+def against_reference(ref, cases, repeat):
+    """Regressions of the working tree against `ref`, both measured now, case by case."""
+    tree = worktree(ref)
+    reference, results = {}, {}
+    try:
+        print(header())
+        for name in cases:
+            try:
+                reference[name] = run(name, repeat, tree=tree)
+            except subprocess.CalledProcessError:
+                print(f"⚠️ {name}: cannot be measured at {ref}, skipped")
+                continue
+            results[name] = run(name, repeat)
+            print(row(f"{name} @{ref}"[:37], reference[name]))
+            print(row(name, results[name]))
+    finally:
+        remove_worktree(tree)
+    return results, reference
+
+
+def report(found, threshold, against):
+    """Print the regressions found and exit 1 if there are any."""
+    for name, metric, before, now in found:
+        print(f"⚠️ {name}: {metric} {before:,} -> {now:,} (+{(now / before - 1) * 100 if before else float('inf'):.0f}%)")
+    if found:
+        sys.exit(1)
+    print(f"✅ No regressions past {threshold:.0%} against {against}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--case", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative growth per metric")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--artifacts", action="store_true", help="let cases read the offline build")
+    parser.add_argument("--reference", metavar="REF",
+                        help="compare with this git ref measured now, not with the baseline")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        measure(args.measure, args.repeat)
+        return
+
+    if args.reference:
+        if args.save or args.artifacts:
+            parser.error("--reference measures both trees without the offline build and saves nothing")
+        results, reference = against_reference(args.reference, args.case, args.repeat)
+        report(regressions(results, reference, args.threshold), args.threshold, args.reference)
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    current = environment(args.artifacts, args.repeat)
+    recorded = baseline.get(ENVIRONMENT, {})
+    if baseline and any(recorded.get(key) != current[key] for key in SETTINGS):
+        if not args.save:
+            print(f"⚠️ {args.baseline} was measured with {recorded}, this run uses {current}: "
+                  f"not comparable, run with the same settings or --save a new baseline")
+            sys.exit(2)
+    if args.save and recorded != current:
+        # Results from another environment must not be mixed into the new baseline
+        baseline = {}
+
+    print(header())
+    results = {}
+    for name in args.case:
+        results[name] = run(name, args.repeat, args.artifacts)
+        print(row(name, results[name]))
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump({**baseline, **results, ENVIRONMENT: current}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Baseline written to {args.baseline}")
+        return
+    if not baseline:
+        print(f"⚠️ No baseline at {args.baseline}; run with --save to create one")
+        return
+
+    metrics = METRICS
+    if (recorded.get("machine"), recorded.get("repeat")) != (current["machine"], current["repeat"]):
+        metrics = tuple(metric for metric in METRICS if metric not in TIMINGS)
+        print(f"⚠️ Baseline timings come from {recorded.get('machine')} with --repeat {recorded.get('repeat')}: "
+              f"comparing memory and bytes only (--reference REF gates timings on this machine)")
+    report(regressions(results, baseline, args.threshold, metrics), args.threshold, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Design-based prevalence with replicate variances: matrix path vs row re-weighting.
+
+Checks the PSU-collapsed replicate product against re-weighting every row
+once per jackknife replicate, then times district estimates for both
+replication methods.
+
+    python -m benchmarks.survey_variance [--source nisr] [--replicates 1000]
+"""
+import argparse
+import time
+
+import numpy as np
+
+import utils.survey as survey
+from utils.normalize import get_normalized
+
+
+def naive_jackknife_se(design, y, x):
+    """One full pass over the rows per replicate."""
+    row_factors = design.factors[design.psu_index]
+    w = design.weights
+    estimate = (w @ y) / (w @ x)
+    replicates = ((row_factors * w[:, None]).T @ y) / ((row_factors * w[:, None]).T @ x)
+    return estimate, np.sqrt(((replicates - estimate) ** 2) @ design.coefficients)
+
+
+def timed_ms(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default="nisr")
+    parser.add_argument("--replicates", type=int, default=1000)
+    args = parser.parse_args()
+
+    df = get_normalized(args.source)
+    estimator = survey.SurveyEstimator(df)
+    design = estimator.design
+    y = (estimator.flags["stunted"] & estimator.measured).astype(float)
+    x = estimator.measured.astype(float)
+    print(f"{len(df):,} rows, {design.n_psu} PSUs, {design.factors.shape[1]} jackknife replicates")
+
+    fast = design.ratio(y, x)
+    slow = naive_jackknife_se(design, y, x)
+    print(f"national rate {fast[0][0] * 100:.2f}%  SE {fast[1][0] * 100:.3f}  "
+          f"(|diff| vs row re-weighting: {abs(fast[1][0] - slow[1]):.2g})")
+    print(f"row re-weighting:     {timed_ms(lambda: naive_jackknife_se(design, y, x)):8.1f} ms")
+    print(f"PSU-collapsed:        {timed_ms(lambda: design.ratio(y, x)):8.1f} ms")
+
+    groups, levels = estimator._groups["district"]
+    bootstrap = survey.SurveyDesign.from_frame(df, method="bootstrap", replicates=args.replicates)
+    print(f"\n{'district estimates':<28}{'ms':>10}")
+    for name, d in (("jackknife", design), (f"bootstrap x{args.replicates}", bootstrap)):
+        print(f"{name:<28}{timed_ms(lambda: d.prevalence(y, x, groups, levels)):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
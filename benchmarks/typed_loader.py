@@ -0,0 +1,114 @@
+"""Memory of the typed nutrition loader vs the default-dtype read it replaces.
+
+The typed loader is utils.normalize.read_nutrition_csv, as the app reads
+the file: compact dtypes, with WHO clipping and the packed indicators
+column applied chunk by chunk while streaming. Each loader runs in a fresh
+subprocess straight from the CSV (no columnar cache) and reports peak
+traced allocations, peak RSS growth and the deep size of the resulting frame. --scale repeats the file to mimic larger,
+multi-round survey extracts.
+
+    python -m benchmarks.typed_loader [--scale 1 10] [--chunk-rows 50000]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from utils.data_registry import resolve_path
+from utils.normalize import read_nutrition_csv
+
+
+def legacy_load(path):
+    """The previous utils.plots.load_nutrition_data, minus the registry."""
+    df = pd.read_csv(path)
+    df.loc[(df["height_for_age_z"] < -6) | (df["height_for_age_z"] > 6), "height_for_age_z"] = np.nan
+    df.loc[(df["weight_for_height_z"] < -5) | (df["weight_for_height_z"] > 5), "weight_for_height_z"] = np.nan
+    df.loc[(df["weight_for_age_z"] < -6) | (df["weight_for_age_z"] > 5), "weight_for_age_z"] = np.nan
+    df["stunted"] = (df["height_for_age_z"] < -2).astype(int)
+    df["wasted"] = (df["weight_for_height_z"] < -2).astype(int)
+    df["underweight"] = (df["weight_for_age_z"] < -2).astype(int)
+    df["malnourished"] = ((df["stunted"] == 1) | (df["wasted"] == 1) | (df["underweight"] == 1)).astype(int)
+    return df
+
+
+def load(loader, path, chunk_rows):
+    if loader == "legacy":
+        return legacy_load(path)
+    return read_nutrition_csv(path, chunk_rows)
+
+
+def measure(loader, path, chunk_rows):
+    """Run one loader in this process and print its numbers as JSON."""
+    # Untraced run for wall time and peak RSS; tracemalloc slows the many
+    # small allocations of the chunked path, so it only gets a second run
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    df = load(loader, path, chunk_rows)
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    resident = df.memory_usage(deep=True).sum()
+    del df
+
+    tracemalloc.start()
+    df = load(loader, path, chunk_rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(json.dumps({
+        "rows": len(df),
+        "seconds": elapsed,
+        "peak_mb": peak / 1e6,
+        # ru_maxrss is in KiB on Linux
+        "rss_growth_mb": (rss_after - rss_before) * 1024 / 1e6,
+        "resident_mb": resident / 1e6,
+    }))
+
+
+def run(loader, path, chunk_rows):
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.typed_loader", "--measure", loader, path, str(chunk_rows)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--measure", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        loader, path, chunk_rows = args.measure
+        measure(loader, path, int(chunk_rows))
+        return
+
+    source = resolve_path("children_nutrition")
+    with open(source) as f:
+        header, body = f.readline(), f.read()
+
+    print(f"{'scale':<7}{'rows':>10}  {'loader':<8}{'seconds':>9}{'peak MB':>10}{'RSS +MB':>10}{'frame MB':>10}")
+    for scale in args.scale:
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as tmp:
+            tmp.write(header)
+            for _ in range(scale):
+                tmp.write(body)
+        try:
+            for loader in ("legacy", "typed"):
+                r = run(loader, tmp.name, args.chunk_rows)
+                print(f"{scale:<7}{r['rows']:>10,}  {loader:<8}{r['seconds']:>9.2f}{r['peak_mb']:>10.1f}"
+                      f"{r['rss_growth_mb']:>10.1f}{r['resident_mb']:>10.1f}")
+        finally:
+            os.remove(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
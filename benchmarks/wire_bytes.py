@@ -0,0 +1,84 @@
+"""Bytes on the wire per page, uncompressed vs compressed, first and repeat visit.
+
+Drives the app in-process with Flask's test client. For each page it sends
+the render_page callback request and fetches every /static-data URL the
+response references (first visit), then revalidates those URLs with their
+ETags (repeat visit: 304, no body). The app shell (index, layout and
+dependencies) is reported once.
+
+    python -m benchmarks.wire_bytes [--encodings identity gzip br]
+"""
+import argparse
+import os
+import re
+
+# Page data comes from the warm caches, not a background thread
+os.environ.setdefault("NISR_WARM_UP", "0")
+
+from app import PAGES, server  # noqa: E402
+from utils.compression import encodings  # noqa: E402
+from utils.static_files import ROUTE, static_url  # noqa: E402
+
+STATIC_URL = re.compile(rf'{re.escape(ROUTE)}/[0-9a-f]+/[^"\\]+')
+
+
+def page_request(pathname):
+    return {
+        "output": "page-content.children",
+        "outputs": {"id": "page-content", "property": "children"},
+        "inputs": [{"id": "url", "property": "pathname", "value": pathname}],
+        "changedPropIds": ["url.pathname"],
+        "state": [],
+    }
+
+
+def fetch(client, encoding, url, json=None, etag=None):
+    headers = {"Accept-Encoding": encoding}
+    if etag:
+        headers["If-None-Match"] = etag
+    response = client.post(url, json=json, headers=headers) if json else client.get(url, headers=headers)
+    return response, len(response.get_data())
+
+
+def measure(client, encoding, pathname):
+    _, body = fetch(client, encoding, "/_dash-update-component", json=page_request(pathname))
+    # URLs are read from an uncompressed copy of the same response; plotly's
+    # JSON encoder escapes "/" as \u002f
+    text = client.post("/_dash-update-component", json=page_request(pathname)).get_data(as_text=True)
+    text = text.replace("\\u002f", "/")
+    static_first = static_repeat = 0
+    for url in sorted(set(STATIC_URL.findall(text))):
+        static, size = fetch(client, encoding, url)
+        static_first += size
+        _, size = fetch(client, encoding, url, etag=static.headers.get("ETag"))
+        static_repeat += size
+    return body, static_first, static_repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--encodings", nargs="+", default=["identity", *encodings()])
+    args = parser.parse_args()
+
+    client = server.test_client()
+    for pathname in PAGES:
+        # The first render fills the layout cache; measure the steady state
+        client.post("/_dash-update-component", json=page_request(pathname))
+
+    print(f"{'request':<22}" + "".join(f"{encoding:>12}" for encoding in args.encodings))
+    shell = {encoding: sum(fetch(client, encoding, url)[1] for url in ("/", "/_dash-layout", "/_dash-dependencies"))
+             for encoding in args.encodings}
+    print(f"{'app shell':<22}" + "".join(f"{shell[e]:>12,}" for e in args.encodings))
+    logo = {encoding: fetch(client, encoding, static_url("nisr_logo.png"))[1] for encoding in args.encodings}
+    print(f"{'  + logo, first':<22}" + "".join(f"{logo[e]:>12,}" for e in args.encodings))
+
+    for pathname in PAGES:
+        results = {encoding: measure(client, encoding, pathname) for encoding in args.encodings}
+        print(f"{pathname:<22}" + "".join(f"{results[e][0]:>12,}" for e in args.encodings))
+        if any(results[e][1] for e in args.encodings):
+            print(f"{'  + static, first':<22}" + "".join(f"{results[e][1]:>12,}" for e in args.encodings))
+            print(f"{'  + static, repeat':<22}" + "".join(f"{results[e][2]:>12,}" for e in args.encodings))
+
+
+if __name__ == "__main__":
+    main()
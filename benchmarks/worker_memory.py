@@ -0,0 +1,143 @@
+"""Per-worker memory of the gunicorn deployment, with and without preload.
+
+Starts `gunicorn -c gunicorn.conf.py app:server` for each mode, requests
+every page through the Dash callback endpoint so all workers have served
+real traffic, then reads /proc/<pid>/smaps_rollup for the master and each
+worker. "Unique" is memory no other process maps (private clean + dirty),
+i.e. what one more worker costs; "shared" is pages still shared with the
+master or siblings; PSS splits shared pages evenly among their users.
+
+    python -m benchmarks.worker_memory [--workers 4] [--modes off on] [--rounds 3]
+    python -m benchmarks.worker_memory --pid <gunicorn master pid>
+
+Linux only (needs /proc/<pid>/smaps_rollup).
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from utils.data_registry import BASE_DIR
+
+PAGES = ["/overview", "/hotspot", "/model", "/stunting", "/recommendations"]
+FIELDS = ["Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty"]
+
+
+def smaps_rollup(pid):
+    """Memory totals of one process in MB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0].rstrip(":") in FIELDS:
+                values[parts[0].rstrip(":")] = int(parts[1]) * 1024 / 1e6
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "shared": values["Shared_Clean"] + values["Shared_Dirty"],
+        "unique": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+
+def report(master):
+    rows = [("master", master, smaps_rollup(master))]
+    rows += [(f"worker {i + 1}", pid, smaps_rollup(pid)) for i, pid in enumerate(children(master))]
+    print(f"  {'process':<10}{'pid':>8}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>11}{'unique MB':>11}")
+    for label, pid, mem in rows:
+        print(f"  {label:<10}{pid:>8}{mem['rss']:>10.1f}{mem['pss']:>10.1f}{mem['shared']:>11.1f}{mem['unique']:>11.1f}")
+    workers = [mem for label, _, mem in rows if label != "master"]
+    total_pss = sum(mem["pss"] for _, _, mem in rows)
+    mean_unique = sum(mem["unique"] for mem in workers) / max(len(workers), 1)
+    print(f"  total PSS {total_pss:.1f} MB, mean unique per worker {mean_unique:.1f} MB")
+    return {"total_pss": total_pss, "mean_unique": mean_unique, "workers": len(workers)}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def render(port, pathname):
+    body = {
+        "output": "page-content.children",
+        "outputs": {"id": "page-content", "property": "children"},
+        "inputs": [{"id": "url", "property": "pathname", "value": pathname}],
+        "changedPropIds": ["url.pathname"],
+        "state": [],
+    }
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/_dash-update-component",
+        data=json.dumps(body).encode(), headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request, timeout=120) as response:
+        response.read()
+
+
+def wait_ready(port, process, timeout=300):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5) as response:
+                response.read()
+            return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError("gunicorn did not become ready")
+
+
+def run(mode, workers, rounds):
+    port = free_port()
+    env = dict(os.environ, NISR_PRELOAD="1" if mode == "on" else "0",
+               WEB_CONCURRENCY=str(workers), PORT=str(port))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", "app:server"],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        start = time.perf_counter()
+        wait_ready(port, process)
+        ready = time.perf_counter() - start
+        # The kernel spreads connections over the workers; enough rounds make
+        # every worker render every page at least once in practice
+        for _ in range(rounds * workers):
+            for pathname in PAGES:
+                render(port, pathname)
+        print(f"preload {mode}: {workers} workers, ready in {ready:.1f}s")
+        return report(process.pid)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", choices=["off", "on"], default=["off", "on"])
+    parser.add_argument("--rounds", type=int, default=3, help="page renders per worker")
+    parser.add_argument("--pid", type=int, help="report on a running gunicorn master instead")
+    args = parser.parse_args()
+
+    if args.pid:
+        report(args.pid)
+        return
+    results = {mode: run(mode, args.workers, args.rounds) for mode in args.modes}
+    if len(results) == 2:
+        off, on = results["off"], results["on"]
+        print(f"preload saves {off['mean_unique'] - on['mean_unique']:.1f} MB per extra worker "
+              f"({off['total_pss']:.1f} -> {on['total_pss']:.1f} MB total PSS)")
+
+
+if __name__ == "__main__":
+    main()
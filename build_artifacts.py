@@ -0,0 +1,250 @@
+"""Precompute every dashboard artifact into a build directory.
+
+Writes normalized columnar data, the district cubes, survey estimates,
+factor importance, simplified geometry, the page figures and the compiled
+model, plus a manifest with the content hash of every input and output.
+The app reads these instead of recomputing them while the inputs match.
+
+    python -m build_artifacts [--out build] [--check]
+"""
+import os
+
+# Always build from the sources, never from a previous build
+os.environ["NISR_USE_ARTIFACTS"] = "0"
+
+import argparse
+import datetime
+import hashlib
+import json
+import shutil
+import sys
+import time
+
+import joblib
+import numpy as np
+import plotly.io as pio
+import sklearn
+
+from utils import artifacts
+from utils.data_registry import BASE_DIR, DATASETS, file_hash
+from utils.geometry import GEOJSON_PATH, TOLERANCES
+from utils.model_registry import MODELS
+from utils.normalize import NORMALIZE_VERSION
+
+# Survey designs for every page source; the cube only backs the chatbot's query index
+ESTIMATE_SOURCES = ["nisr", "df_clean"]
+CUBE_SOURCES = ["nisr"]
+
+
+def _relative(path):
+    return os.path.relpath(path, BASE_DIR) if path.startswith(BASE_DIR) else path
+
+
+class Build:
+    """Collects files and their manifest entries in a staging directory."""
+
+    def __init__(self, out_dir):
+        self.out_dir = os.path.abspath(out_dir)
+        self.stage = f"{self.out_dir}.tmp-{os.getpid()}"
+        shutil.rmtree(self.stage, ignore_errors=True)
+        os.makedirs(self.stage)
+        self.inputs = {}
+        self.outputs = {}
+
+    def add_input(self, key, path):
+        self.inputs[key] = {"path": _relative(path), "sha256": file_hash(path)}
+
+    def write(self, name, data, inputs):
+        path = os.path.join(self.stage, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        self.outputs[name] = {
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "bytes": len(data),
+            "inputs": sorted(inputs),
+        }
+
+    def write_file(self, name, save, inputs):
+        """For writers that need a path (parquet, npz, joblib)."""
+        path = os.path.join(self.stage, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        save(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        self.write(name, data, inputs)
+
+    def write_json(self, name, obj, inputs):
+        self.write(name, json.dumps(obj, separators=(",", ":")).encode(), inputs)
+
+    def write_figure(self, name, fig, inputs):
+        self.write(f"figures/{name}.json", pio.to_json(fig, validate=False).encode(), inputs)
+
+    def finish(self):
+        manifest = {
+            "format": artifacts.FORMAT_VERSION,
+            "normalize_version": NORMALIZE_VERSION,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "sklearn_version": sklearn.__version__,
+            "inputs": self.inputs,
+            "artifacts": self.outputs,
+        }
+        with open(os.path.join(self.stage, artifacts.MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+        # Swap the whole directory so a running app never sees half a build
+        old = f"{self.out_dir}.old-{os.getpid()}"
+        if os.path.exists(self.out_dir):
+            os.replace(self.out_dir, old)
+        os.replace(self.stage, self.out_dir)
+        shutil.rmtree(old, ignore_errors=True)
+        return manifest
+
+
+def step(label):
+    def wrap(fn):
+        def run(*args):
+            start = time.perf_counter()
+            fn(*args)
+            print(f"  {label:<28}{(time.perf_counter() - start) * 1000:8.0f} ms")
+        return run
+    return wrap
+
+
+@step("normalized data")
+def build_data(build, sources):
+    from utils.normalize import artifact_name, get_normalized
+    for source in sources:
+        df = get_normalized(source)
+        build.write_file(artifact_name(source), lambda path: df.to_parquet(path, index=False), [source])
+
+
+@step("cubes and survey estimates")
+def build_aggregates(build, sources):
+    from utils.cube import get_cube
+    from utils.survey import get_estimator
+    for source in sources:
+        if source in CUBE_SOURCES:
+            arrays = get_cube(source).to_arrays()
+            build.write_file(f"aggregates/cube-{source}.npz", lambda path: np.savez(path, **arrays), [source])
+        build.write_json(f"aggregates/estimates-{source}.json", get_estimator(source).export(), [source])
+
+
+@step("factor importance")
+def build_factor_importance(build):
+    from utils.factor_importance import FactorEngine
+    from utils.normalize import get_normalized
+    importance = FactorEngine(get_normalized("df_clean")).importance()
+    build.write_file("aggregates/factor_importance-df_clean.parquet",
+                     lambda path: importance.to_parquet(path), ["df_clean"])
+
+
+@step("geometry")
+def build_geometry(build):
+    from utils.geometry import artifact_name, district_geojson_bytes, district_neighbours
+    for detail in TOLERANCES:
+        build.write(artifact_name(detail), district_geojson_bytes(detail), ["geometry"])
+    neighbours = {str(code): found for code, found in district_neighbours().items()}
+    build.write_json("geometry/neighbours.json", neighbours, ["geometry"])
+
+
+@step("figures")
+def build_figures(build, has_geometry):
+    from layouts.overview import create_overview_figures
+    pie_fig, bar_fig = create_overview_figures()
+    build.write_figure("overview-pie", pie_fig, ["nisr"])
+    build.write_figure("overview-bar", bar_fig, ["nisr"])
+
+    from layouts.stunting import create_factor_bar_chart, page_data
+    build.write_figure("stunting-factor-bar", create_factor_bar_chart(page_data().importance_df), ["df_clean"])
+
+    if has_geometry:
+        from layouts.hotspot import create_hotspot_map
+        from layouts.mal import create_mal_map
+        from utils.small_area import MODES
+        for mode in MODES:
+            build.write_figure(f"hotspot-{mode}", create_hotspot_map(mode), ["nisr", "geometry"])
+        build.write_figure("mal-map", create_mal_map(), ["nisr", "geometry"])
+
+
+@step("compiled models")
+def build_models(build):
+    from utils.compiled_model import compile_model
+    from utils.model_registry import get_model
+    for name in MODELS:
+        model = get_model(name)
+        if model is None:
+            continue
+        compiled = compile_model(model)
+        build.write_file(f"models/{name}-compiled.joblib", lambda path: joblib.dump(compiled, path),
+                         [f"model:{name}"])
+
+
+def build_all(out_dir):
+    build = Build(out_dir)
+    sources = [name for name, path in DATASETS.items() if os.path.exists(path)]
+    for name in sources:
+        build.add_input(name, DATASETS[name])
+    has_geometry = os.path.exists(GEOJSON_PATH)
+    if has_geometry:
+        build.add_input("geometry", GEOJSON_PATH)
+    for name, path in MODELS.items():
+        if os.path.exists(path):
+            build.add_input(f"model:{name}", path)
+
+    print(f"Building artifacts into {build.out_dir}")
+    build_data(build, sources)
+    build_aggregates(build, [s for s in ESTIMATE_SOURCES if s in sources])
+    if "df_clean" in sources:
+        build_factor_importance(build)
+    if has_geometry:
+        build_geometry(build)
+    else:
+        print(f"  ⚠️ No boundaries at {GEOJSON_PATH}; skipping geometry and maps")
+    build_figures(build, has_geometry)
+    build_models(build)
+
+    manifest = build.finish()
+    total = sum(entry["bytes"] for entry in manifest["artifacts"].values())
+    print(f"✅ {len(manifest['artifacts'])} artifacts, {total / 1e6:.1f} MB")
+
+
+def check(out_dir):
+    """Verify output hashes and report inputs that changed since the build."""
+    path = os.path.join(out_dir, artifacts.MANIFEST)
+    if not os.path.exists(path):
+        print(f"⚠️ No build in {out_dir}")
+        return 1
+    with open(path) as f:
+        manifest = json.load(f)
+    problems = 0
+    for name, entry in manifest["artifacts"].items():
+        with open(os.path.join(out_dir, name), "rb") as f:
+            if hashlib.sha256(f.read()).hexdigest() != entry["sha256"]:
+                print(f"⚠️ {name}: content does not match the manifest")
+                problems += 1
+    for key, entry in manifest["inputs"].items():
+        source = os.path.join(BASE_DIR, entry["path"])
+        if os.path.exists(source) and file_hash(source) != entry["sha256"]:
+            print(f"⚠️ {key}: {entry['path']} changed since the build")
+            problems += 1
+    if manifest.get("normalize_version") != NORMALIZE_VERSION:
+        print("⚠️ Built with a different NORMALIZE_VERSION")
+        problems += 1
+    if not problems:
+        print(f"✅ {len(manifest['artifacts'])} artifacts match, built {manifest['created']}")
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", default=artifacts.BUILD_DIR)
+    parser.add_argument("--check", action="store_true", help="verify an existing build instead")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(check(args.out))
+    build_all(args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
 
-from dash import html, dcc
+import re
+
+from dash import html, dcc, ClientsideFunction, Patch, no_update
 from dash.dependencies import Input, Output, State
 
+from utils.chat_history import ChatHistory
+from utils.query_index import KeywordIndex, get_query_index
+
 
 chatbot_btn = html.Button("AI Chat", id="chat-btn", n_clicks=0,
     style={"position": "fixed", "bottom": "20px", "right": "20px",
@@ -17,13 +22,18 @@ chatbot_box = html.Div(id="chat-box", children=[
                                          "borderTopLeftRadius": "10px",
                                          "borderTopRightRadius": "10px",
                                          "fontWeight": "bold"}),
-    html.Div(id="chat-messages", style={"height": "350px", "overflowY": "auto",
+    html.Div(id="chat-messages", children=[], style={"height": "350px", "overflowY": "auto",
                                         "padding": "10px", "border": "1px solid #ccc",
                                         "marginBottom": "5px", "display": "flex",
                                         "flexDirection": "column"}),
     html.Div([dcc.Input(id="chat-input", type="text", placeholder="Type a message...",
                         style={"width": "75%", "padding": "8px", "marginRight": "5px"}),
-              html.Button("Send", id="send-btn", n_clicks=0)], style={"display": "flex", "padding": "5px"})
+              html.Button("Send", id="send-btn", n_clicks=0)], style={"display": "flex", "padding": "5px"}),
+    # {"id": session in ChatHistory, "shown": messages currently in the box};
+    # kept in sessionStorage so a reload can restore the transcript
+    dcc.Store(id="chat-session", storage_type="session"),
+    # True once this page load has filled the box; reset by every reload
+    dcc.Store(id="chat-rendered", storage_type="memory")
 ], style={"position": "fixed", "bottom": "80px", "right": "20px",
           "width": "400px", "backgroundColor": "white", "border": "1px solid #ddd",
           "borderRadius": "10px", "padding": "0px", "display": "none",
@@ -40,69 +50,129 @@ FEATURE_EXPLANATIONS = {
     "region_code": "Region Code identifies the geographic region of the household in Rwanda."
 }
 
+FEATURE_INDEX = KeywordIndex({
+    **{word: ("feature", "wealth_index") for word in ("wealth index", "wealth_index")},
+    **{word: ("feature", "mother_education_level") for word in ("education", "schooling", "mother_education_level")},
+    **{word: ("feature", "mother_bmi") for word in ("bmi", "mother_bmi")},
+    **{word: ("feature", "child_current_age_months_b19") for word in ("child age", "child_current_age_months_b19")},
+    **{word: ("feature", "source_of_drinking_water") for word in ("water", "drinking water", "source_of_drinking_water")},
+    **{word: ("feature", "toilet_type") for word in ("toilet", "sanitation", "toilet_type")},
+    **{word: ("feature", "region_code") for word in ("region code", "region_code")},
+})
+GREETING = re.compile(r"\b(hello|hi|hey|hola|how are you)\b")
+EXAMPLES = ["stunting rate in Musanze", "wasting among girls 12-23 months",
+            "top 5 districts by underweight", "stunting by wealth"]
 
-def register_callbacks(app, FEATURES):
-    @app.callback(
+
+def reply(msg, FEATURES):
+    if GREETING.search(msg):
+        return ("Hello! I am NISR AI 🤖.\n"
+                "I can help you explore Rwanda's malnutrition data, "
+                "view stunting predictions, and provide recommendations.\n"
+                "You can ask me about features like: " + ", ".join(FEATURES))
+    if msg.isdigit():
+        num = int(msg)
+        if 1 <= num <= len(FEATURES):
+            feature_name = FEATURES[num - 1]
+            return FEATURE_EXPLANATIONS.get(feature_name, "No explanation available for this feature.")
+        return "Please select a valid number from the list."
+    answer = get_query_index().answer(msg)
+    if answer is not None:
+        return answer
+    features = [value for kind, value, _ in FEATURE_INDEX.match(re.findall(r"[a-z_]+", msg))]
+    if features:
+        return FEATURE_EXPLANATIONS[features[0]]
+    return ("I don't fully understand your request. "
+            "Here are things I can assist with:\n" +
+            "\n".join(f"{i}. {f}" for i, f in enumerate(FEATURES, 1)) +
+            "\nOr ask about the data, e.g. " + "; ".join(f'"{q}"' for q in EXAMPLES))
+
+
+def message_bubble(text, user):
+    if user:
+        return html.Div(text, style={
+            "alignSelf": "flex-end", "backgroundColor": "#007bff",
+            "color": "white", "padding": "8px", "borderRadius": "10px",
+            "marginBottom": "5px", "maxWidth": "80%"})
+    return html.Div(text, style={
+        "alignSelf": "flex-start",
+        "backgroundColor": "#e5e5e5",
+        "color": "black",
+        "padding": "8px",
+        "borderRadius": "10px",
+        "marginBottom": "5px",
+        "whiteSpace": "pre-line",
+        "maxWidth": "80%"})
+
+
+def register_callbacks(app, FEATURES, history=None):
+    # Showing the box and scrolling it run in the browser (assets/clientside.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace="ui", function_name="toggle_chat"),
         Output("chat-box", "style"),
         Input("chat-btn", "n_clicks"),
         State("chat-box", "style"),
         prevent_initial_call=True
     )
-    def toggle_chat(n, style):
-        style = style or {"display": "none"}
-        style["display"] = "block" if style.get("display") == "none" else "none"
-        return style
 
+    app.clientside_callback(
+        ClientsideFunction(namespace="ui", function_name="scroll_chat"),
+        Output("scroll-dummy", "children"),
+        Input("chat-messages", "children"),
+        prevent_initial_call=True
+    )
+
+    history = ChatHistory() if history is None else history
+
+    # Only the new exchange travels: the transcript stays on the server and
+    # the box is extended with a partial update, dropping the oldest
+    # messages beyond the history window
     @app.callback(
         Output("chat-messages", "children"),
         Output("chat-input", "value"),
-        Output("scroll-trigger", "data"),
+        Output("chat-session", "data"),
+        Output("chat-rendered", "data"),
         Input("send-btn", "n_clicks"),
         State("chat-input", "value"),
-        State("chat-messages", "children"),
-        State("scroll-trigger", "data"),
+        State("chat-session", "data"),
         prevent_initial_call=True
     )
-    def handle_message(n_clicks, msg, messages, scroll_data):
-        if messages is None:
-            messages = []
-
+    def handle_message(n_clicks, msg, session):
         msg = str(msg or "").strip().lower()
         if not msg:
-            return messages, "", scroll_data
+            return no_update, "", no_update, no_update
 
-        messages.append(html.Div(msg, style={
-            "alignSelf": "flex-end", "backgroundColor": "#007bff",
-            "color": "white", "padding": "8px", "borderRadius": "10px",
-            "marginBottom": "5px", "maxWidth": "80%"}))
-
-        greetings = ["hello", "hi", "hey", "hola", "how are you"]
-        if any(greet in msg for greet in greetings):
-            ai_text = ("Hello! I am NISR AI 🤖.\n"
-                       "I can help you explore Rwanda's malnutrition data, "
-                       "view stunting predictions, and provide recommendations.\n"
-                       "You can ask me about features like: " + ", ".join(FEATURES))
-        elif msg.isdigit():
-            num = int(msg)
-            if 1 <= num <= len(FEATURES):
-                feature_name = FEATURES[num - 1]
-                ai_text = FEATURE_EXPLANATIONS.get(feature_name, "No explanation available for this feature.")
-            else:
-                ai_text = "Please select a valid number from the list."
-        else:
-            ai_text = ("I don't fully understand your request. "
-                       "Here are things I can assist with:\n" +
-                       "\n".join(f"{i}. {f}" for i, f in enumerate(FEATURES, 1)))
-
-        messages.append(html.Div(ai_text, style={
-            "alignSelf": "flex-start",
-            "backgroundColor": "#e5e5e5",
-            "color": "black",
-            "padding": "8px",
-            "borderRadius": "10px",
-            "marginBottom": "5px",
-            "whiteSpace": "pre-line",
-            "maxWidth": "80%"}))
-
-        scroll_data = (scroll_data or 0) + 1
-        return messages, "", scroll_data
+        session = session or {"id": history.new_session(), "shown": 0}
+        ai_text = reply(msg, FEATURES)
+        history.append(session["id"], ("user", msg), ("ai", ai_text))
+
+        messages = Patch()
+        shown = session["shown"] + 2
+        for _ in range(max(shown - history.window, 0)):
+            del messages[0]
+        messages.append(message_bubble(msg, user=True))
+        messages.append(message_bubble(ai_text, user=False))
+        return messages, "", {"id": session["id"], "shown": min(shown, history.window)}, True
+
+    # On reload, refill the box from the server transcript once the session
+    # store has been read back from sessionStorage (its data is not there yet
+    # on the initial call, only when modified_timestamp changes). Later
+    # writes to the store find chat-rendered set and are ignored. Transcripts
+    # live in one worker's ChatHistory: a reload served by another worker,
+    # or after a restart or the TTL, finds none and starts an empty box.
+    @app.callback(
+        Output("chat-messages", "children", allow_duplicate=True),
+        Output("chat-session", "data", allow_duplicate=True),
+        Output("chat-rendered", "data", allow_duplicate=True),
+        Input("chat-session", "modified_timestamp"),
+        State("chat-session", "data"),
+        State("chat-rendered", "data"),
+        prevent_initial_call="initial_duplicate"
+    )
+    def restore_transcript(_, session, rendered):
+        if not session or rendered:
+            return no_update, no_update, no_update
+        # The box must hold exactly what "shown" counts, or handle_message
+        # trims the wrong messages
+        bubbles = [message_bubble(text, user=role == "user") for role, text in history.get(session["id"])]
+        return bubbles, {"id": session["id"], "shown": len(bubbles)}, True
@@ -0,0 +1,39 @@
+"""Gunicorn settings for the dashboard.
+
+    gunicorn -c gunicorn.conf.py app:server
+
+With preload (the default) app.py is imported once in the master: datasets,
+aggregates, survey designs, geometry, page figures and the model are built
+before the workers fork, so every worker starts warm and shares those pages
+with the master instead of holding its own copy. Set NISR_PRELOAD=0 to load
+in each worker instead (e.g. to reload code with --reload).
+
+Measure the effect with `python -m benchmarks.worker_memory`.
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "1"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "120"))
+preload_app = os.environ.get("NISR_PRELOAD", "1") != "0"
+
+if preload_app:
+    # Tells app.py to build every page once before the fork
+    os.environ["NISR_PRELOAD"] = "1"
+    # Objects freed by a collection during the import leave holes that later
+    # allocations fill, dirtying shared pages. Keep the collector off in the
+    # master until everything is loaded (see when_ready).
+    gc.disable()
+
+
+def when_ready(server):
+    # Runs in the master once the app is loaded, before any worker forks.
+    # Move everything loaded so far out of the collector's generations (a
+    # collection in a worker would otherwise write to the header of every
+    # object and copy nearly all shared pages), then collect again as usual
+    # in the master and in every worker it forks.
+    if preload_app:
+        gc.freeze()
+        gc.enable()
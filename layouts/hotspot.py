@@ -1,93 +1,45 @@
-
-import os
-import pandas as pd
-import geopandas as gpd
 import plotly.express as px
-from dash import html, dcc
+from dash import html, dcc, Input, Output
 import dash_bootstrap_components as dbc
 
-def get_layout():
-    current_dir = os.path.dirname(__file__)
-
-    dataset_path = os.path.join(current_dir, "..", "assets", "nisr_dataset1.csv")
-    if not os.path.exists(dataset_path):
-        return html.Div([
-            html.H3("Error loading dataset"),
-            html.P(f"File not found: {dataset_path}")
-        ])
-
-    df_clean = pd.read_csv(dataset_path)
-
-  
-    df_clean['height_for_age_zscore'] = pd.to_numeric(df_clean['height_for_age_zscore'], errors='coerce')
-    if df_clean['height_for_age_zscore'].abs().max() > 10:
-        df_clean['height_for_age_zscore'] = df_clean['height_for_age_zscore'] / 100
-
-  
-    df_clean['stunted'] = df_clean['height_for_age_zscore'] < -2.0
+from utils.artifacts import read_figure
+from utils.data_registry import resolve_path
+from utils.districts import DISTRICT_MAP
+from utils.geometry import GEOJSON_PATH, district_geojson_url, geometry_available
+from utils.layout_cache import data_version
+from utils.normalize import dataset_available
+from utils.small_area import MODES, district_rates
 
-  
-    if "district_code" not in df_clean.columns:
-        return html.Div("Missing required column in dataset: 'district_code'.")
 
+def create_hotspot_map(mode="raw"):
     district_stunting = (
-        df_clean.groupby("district_code")["stunted"]
-        .mean()
-        .reset_index(name="stunting_rate")
+        district_rates("stunted", mode)
+        .rename(columns={"rate": "stunting_rate"})
+        .rename_axis("district_code")
+        .reset_index()
     )
-    district_stunting["stunting_rate"] *= 100  
-
-    district_map = {
-        11: "Nyarugenge", 12: "Gasabo", 13: "Kicukiro",
-        21: "Nyanza", 22: "Gisagara", 23: "Nyaruguru", 24: "Huye",
-        25: "Nyamagabe", 26: "Ruhango", 27: "Muhanga", 28: "Kamonyi",
-        31: "Karongi", 32: "Rutsiro", 33: "Rubavu", 34: "Nyabihu", 35: "Ngororero",
-        36: "Rusizi", 37: "Nyamasheke", 41: "Rulindo", 42: "Gakenke",
-        43: "Musanze", 44: "Burera", 45: "Gicumbi", 51: "Rwamagana",
-        52: "Nyagatare", 53: "Gatsibo", 54: "Kayonza", 55: "Kirehe",
-        56: "Ngoma", 57: "Bugesera"
-    }
-    district_stunting["district_name"] = district_stunting["district_code"].map(district_map)
-
-  
-    geojson_path = os.path.join(current_dir, "..", "assets", "geoBoundaries-RWA-ADM2 (1).geojson")
-
-    
-    if not os.path.exists(geojson_path):
-        return html.Div([
-            html.H3("Error loading GeoJSON map"),
-            html.P(f"File not found: {geojson_path}")
-        ])
-
-    gdf = gpd.read_file(geojson_path)
-    if gdf.crs is None:
-        gdf = gdf.set_crs("EPSG:4326")
+    district_stunting["district_name"] = district_stunting["district_code"].map(DISTRICT_MAP)
 
- 
-    district_stunting['district_name_clean'] = district_stunting['district_name'].str.strip().str.lower()
-    gdf['shapeName_clean'] = gdf['shapeName'].str.strip().str.lower()
+    hover_data = {"stunting_rate": ":.1f", "ci_low": ":.1f", "ci_high": ":.1f", "n": True,
+                  "district_code": False}
+    if mode != "raw":
+        hover_data.update({"raw_rate": ":.1f", "shrinkage": ":.2f"})
 
-    gdf = gdf.merge(
-        district_stunting,
-        left_on='shapeName_clean',
-        right_on='district_name_clean',
-        how='left'
-    )
-
- 
     fig = px.choropleth_map(
-        gdf,
-        geojson=gdf.__geo_interface__,
-        locations="district_name_clean",
-        featureidkey="properties.shapeName_clean",
+        district_stunting,
+        geojson=district_geojson_url(),
+        locations="district_code",
         color="stunting_rate",
         hover_name="district_name",
-        hover_data={"stunting_rate": True},
+        hover_data=hover_data,
+        labels={"stunting_rate": "Stunting rate (%)", "ci_low": "95% CI low", "ci_high": "95% CI high",
+                "n": "Children measured", "raw_rate": "Survey estimate (%)",
+                "shrinkage": "Weight on prior"},
         color_continuous_scale="OrRd",
         center={"lat": -1.94, "lon": 29.87},
         zoom=6.5,
         opacity=0.7,
-        title="Malnutrition Hotspots in Rwanda (Stunting Rates)"
+        title=f"Malnutrition Hotspots in Rwanda (Stunting Rates, {MODES[mode].lower()})"
     )
 
     fig.update_layout(
@@ -95,12 +47,56 @@ def get_layout():
         coloraxis_colorbar=dict(title="Stunting Rate (%)"),
         height=650
     )
+    return fig
+
+
+def hotspot_figure(mode="raw"):
+    return read_figure(f"hotspot-{mode}") or create_hotspot_map(mode)
+
+
+def get_layout():
+    if not dataset_available("nisr"):
+        return html.Div([
+            html.H3("Error loading dataset"),
+            html.P(f"File not found: {resolve_path('nisr')}")
+        ])
+
+
+    if not geometry_available():
+        return html.Div([
+            html.H3("Error loading GeoJSON map"),
+            html.P(f"File not found: {GEOJSON_PATH}")
+        ])
+
 
-  
     layout = dbc.Container([
         html.H3("🗺️ Malnutrition Hotspot Analysis"),
-        html.P("This interactive map shows estimated stunting rates across Rwandan districts."),
-        dcc.Graph(figure=fig, id="hotspot-map")
+        html.P("This interactive map shows estimated stunting rates across Rwandan districts. "
+               "Rates are weighted for the survey design; hover a district for its 95% confidence interval. "
+               "Smoothed rates pull districts with few measured children toward their neighbours or region."),
+        dcc.RadioItems(
+            id="hotspot-rate-mode",
+            options=[{"label": label, "value": mode} for mode, label in MODES.items()],
+            value="raw",
+            inline=True,
+            inputStyle={"marginRight": "5px", "marginLeft": "15px"}
+        ),
+        dcc.Graph(figure=hotspot_figure("raw"), id="hotspot-map")
     ], fluid=True)
 
     return layout
+
+
+def register_callbacks_hotspot(app, cache=None):
+    @app.callback(
+        Output("hotspot-map", "figure"),
+        Input("hotspot-rate-mode", "value"),
+        prevent_initial_call=True
+    )
+    def update_hotspot_map(mode):
+        # The value comes from the client: anything unknown gets the default map
+        mode = mode if isinstance(mode, str) and mode in MODES else "raw"
+        if cache is None:
+            return hotspot_figure(mode)
+        return cache.get_or_build("/hotspot", {"mode": mode}, data_version(["nisr"]),
+                                  lambda: hotspot_figure(mode))
@@ -1,61 +1,28 @@
-import pandas as pd
-import geopandas as gpd
 import plotly.express as px
 from dash import dcc, html
 
-def get_layout():
-  
-    fn = r"C:\Users\user\Desktop\Elysee\Data_Duo_NISR_project-\assets\nisr_dataset1.csv"  # update path
-    df_clean = pd.read_csv(fn)
+from utils.artifacts import read_figure
+from utils.districts import DISTRICT_MAP
+from utils.geometry import district_geojson_url
+from utils.survey import estimate
 
+def create_mal_map():
     district_stunting = (
-        df_clean
-        .groupby("district_code")["height_for_age_zscore"]
-        .apply(lambda x: (x < -200).mean())  # < -2.00 z-score
-        .reset_index(name="stunting_rate")
-    )
-    district_stunting["stunting_rate"] *= 100
-
-   
-    district_map = {
-        11: "Nyarugenge", 12: "Gasabo", 13: "Kicukiro",
-        21: "Nyanza", 22: "Gisagara", 23: "Nyaruguru", 24: "Huye",
-        25: "Nyamagabe", 26: "Ruhango", 27: "Muhanga", 28: "Kamonyi",
-        31: "Karongi", 32: "Rutsiro", 33: "Rubavu", 34: "Nyabihu", 35: "Ngororero",
-        36: "Rusizi", 37: "Nyamasheke", 41: "Rulindo", 42: "Gakenke",
-        43: "Musanze", 44: "Burera", 45: "Gicumbi", 51: "Rwamagana",
-        52: "Nyagatare", 53: "Gatsibo", 54: "Kayonza", 55: "Kirehe",
-        56: "Ngoma", 57: "Bugesera"
-    }
-    district_stunting["district_name"] = district_stunting["district_code"].map(district_map)
-
-  
-    geo_path = r"C:\Users\user\Desktop\NISR\Hackthon\geoBoundaries-RWA-ADM2 (1).geojson"
-    gdf = gpd.read_file(geo_path)
-    gdf = gdf.set_crs("EPSG:4326") if gdf.crs is None else gdf
-
- 
-    gdf['shapeName_clean'] = gdf['shapeName'].str.strip().str.lower()
-    district_stunting['district_name_clean'] = district_stunting['district_name'].str.strip().str.lower()
-
-    gdf = gdf.merge(
-        district_stunting,
-        left_on='shapeName_clean',
-        right_on='district_name_clean',
-        how='left'
+        estimate("stunted", by="district")
+        .rename(columns={"rate": "stunting_rate"})
+        .rename_axis("district_code")
+        .reset_index()
     )
-
-    rwanda_geojson = gdf.__geo_interface__
+    district_stunting["district_name"] = district_stunting["district_code"].map(DISTRICT_MAP)
 
     fig = px.choropleth_map(
-        gdf,
-        geojson=rwanda_geojson,
-        locations="district_name_clean",
-        featureidkey="properties.shapeName_clean",
+        district_stunting,
+        geojson=district_geojson_url(),
+        locations="district_code",
         color="stunting_rate",
         color_continuous_scale="OrRd",
         hover_name="district_name",
-        hover_data={"stunting_rate": True},
+        hover_data={"stunting_rate": ":.1f", "ci_low": ":.1f", "ci_high": ":.1f", "district_code": False},
         center={"lat": -1.94, "lon": 29.87},
         zoom=6.5,
         opacity=0.7,
@@ -66,6 +33,11 @@ def get_layout():
         margin={"r":0, "t":40, "l":0, "b":0},
         coloraxis_colorbar=dict(title="Stunting Rate (%)")
     )
+    return fig
+
+
+def get_layout():
+    fig = read_figure("mal-map") or create_mal_map()
 
     return html.Div([
         html.H3("Malnutrition Hotspot"),
@@ -1,18 +1,11 @@
 
-import dash
 from dash import html, dcc, Input, Output, State
 import dash_bootstrap_components as dbc
-import joblib
-import pandas as pd
-import numpy as np
+import plotly.graph_objects as go
 
-
-MODEL_PATH = "assets/best_stunting_model_hgb_no_impute.joblib"
-try:
-    model = joblib.load(MODEL_PATH)
-except Exception as e:
-    model = None
-    print(f"⚠️ Error loading model: {e}")
+from utils.model_registry import get_model, model_info
+from utils.normalize import get_normalized
+from utils.sweep import MAX_POINTS, run_sweep, sweep_values
 
 FEATURES = [
     "wealth_index",
@@ -44,49 +37,98 @@ def get_layout():
             ], className="mb-3")
         )
 
+    info = model_info("stunting")
+    model_caption = (
+        f"Model {info['estimator']} · version {info['version']} · updated {info['modified']}"
+        if "version" in info else f"⚠️ Model unavailable: {info.get('error')}"
+    )
+
     layout = dbc.Container([
         html.H3("🤖 Predict Child Stunting Risk"),
         html.P("Enter household and child characteristics to estimate stunting risk."),
+        html.Small(model_caption, className="text-muted d-block mb-3"),
 
         html.Div(input_fields),
         dbc.Button("Predict", id="predict-btn", color="primary", className="mt-3"),
         html.Br(), html.Br(),
-        html.Div(id="prediction-output", style={"fontWeight": "bold", "fontSize": "18px"})
+        html.Div(id="prediction-output", style={"fontWeight": "bold", "fontSize": "18px"}),
+
+        html.Hr(),
+        html.H4("📂 Batch Prediction"),
+        html.P(
+            "Upload a CSV or Parquet file with one row per child and the columns: "
+            + ", ".join(FEATURES) + ". The scored file downloads automatically. "
+            "Scripts can POST the same file to /api/predict/batch."
+        ),
+        dcc.Upload(
+            id="batch-upload",
+            children=html.Div(["Drag and drop or ", html.A("select a file")]),
+            style={"width": "100%", "height": "60px", "lineHeight": "60px",
+                   "borderWidth": "1px", "borderStyle": "dashed",
+                   "borderRadius": "5px", "textAlign": "center"},
+            multiple=False
+        ),
+        dcc.Loading(html.Div(id="batch-output", className="mt-2")),
+        dcc.Download(id="batch-download"),
+
+        html.Hr(),
+        html.H4("📈 What-if Sweep"),
+        html.P(
+            "Vary one or two characteristics of the child entered above across their "
+            "observed range and see how the predicted risk responds."
+        ),
+        dbc.Row([
+            dbc.Col(dcc.Dropdown(id="sweep-x", options=FEATURES, value="wealth_index",
+                                 clearable=False), md=4),
+            dbc.Col(dcc.Dropdown(id="sweep-y", options=FEATURES,
+                                 placeholder="Optional second feature"), md=4),
+            dbc.Col(dcc.Input(id="sweep-points", type="number", value=50, min=2,
+                              max=MAX_POINTS, style={"width": "100%"}), md=2),
+            dbc.Col(dbc.Button("Run sweep", id="sweep-btn", color="secondary"), md=2)
+        ], className="mb-2"),
+        html.Div(id="sweep-info", className="text-muted"),
+        dcc.Loading(dcc.Graph(id="sweep-graph", figure=go.Figure()))
     ], fluid=True)
 
     return layout
 
 
-
-def register_callbacks(app):
+def register_callbacks_model(app):
     @app.callback(
-        Output("prediction-output", "children"),
-        Input("predict-btn", "n_clicks"),
-        [State(f"input-{feat}", "value") for feat in FEATURES]
+        Output("sweep-graph", "figure"),
+        Output("sweep-info", "children"),
+        Input("sweep-btn", "n_clicks"),
+        State("sweep-x", "value"),
+        State("sweep-y", "value"),
+        State("sweep-points", "value"),
+        [State(f"input-{feat}", "value") for feat in FEATURES],
+        prevent_initial_call=True
     )
-    def predict_stunting(n_clicks, *vals):
-        if not n_clicks:
-            return ""
-
-        if model is None:
-            return "⚠️ Model not loaded properly."
-
-        input_data = dict(zip(FEATURES, vals))
-        df_input = pd.DataFrame([input_data])
-
+    def run_what_if_sweep(n_clicks, x, y, points, *values):
+        clf = get_model("stunting", compiled=True)
+        if clf is None:
+            return go.Figure(), "⚠️ Model not loaded properly."
+        y = y if y and y != x else None
+        points = int(min(max(points or 50, 2), MAX_POINTS))
+
+        data = get_normalized("df_clean")
+        x_values = sweep_values(data, x, points)
+        y_values = sweep_values(data, y, points) if y else None
         try:
-            for col in FEATURES:
-                if col not in df_input.columns:
-                    df_input[col] = np.nan
-
-            prob = model.predict_proba(df_input)[:, 1][0]
-            label = model.predict(df_input)[0]
-
-            result_text = f"Predicted stunting risk: {prob*100:.2f}%"
-            if label == 1:
-                return f"🚨 {result_text} — Child is likely stunted."
-            else:
-                return f"✅ {result_text} — Child is not likely stunted."
-
+            probs, elapsed = run_sweep(clf, FEATURES, values, x_values, x, y_values, y)
         except Exception as e:
-            return f"⚠️ Error predicting: {e}"
+            return go.Figure(), f"⚠️ Error running sweep: {e}"
+
+        if y:
+            fig = go.Figure(go.Heatmap(
+                x=x_values, y=y_values, z=probs * 100, colorscale="OrRd",
+                colorbar=dict(title="Risk (%)"),
+                hovertemplate=f"{x}: %{{x}}<br>{y}: %{{y}}<br>Risk: %{{z:.1f}}%<extra></extra>"
+            ))
+            fig.update_layout(xaxis_title=x, yaxis_title=y)
+        else:
+            fig = go.Figure(go.Scatter(x=x_values, y=probs * 100, mode="lines+markers"))
+            fig.update_layout(xaxis_title=x, yaxis_title="Predicted stunting risk (%)")
+        fig.update_layout(title=f"Predicted Stunting Risk by {x}" + (f" and {y}" if y else ""),
+                          template="plotly_white")
+        return fig, f"Scored {probs.size:,} points in {elapsed * 1000:.1f} ms (one model call)."
@@ -1,34 +1,16 @@
 
-import os
-import pandas as pd
 import plotly.express as px
 from dash import html, dcc
 import dash_bootstrap_components as dbc
 
-def get_layout_overview():
-    
-    current_dir = os.path.dirname(__file__)
-    fn = os.path.join(current_dir, "..", "assets", "nisr_dataset1.csv")
-    df = pd.read_csv(fn)
-
-   
-    df['height_for_age_zscore'] = df['height_for_age_zscore'] / 100
-    df['weight_for_age_zscore'] = df['weight_for_age_zscore'] / 100
-    df['weight_for_height_zscore'] = df['weight_for_height_zscore'] / 100
-    df['bmi_for_age_zscore'] = df['bmi_for_age_zscore'] / 100
-
-   
-    df['malnourished'] = (
-        (df['height_for_age_zscore'] < -2) |
-        (df['weight_for_age_zscore'] < -2) |
-        (df['weight_for_height_zscore'] < -2) |
-        (df['bmi_for_age_zscore'] < -2)
-    )
-
+from utils.artifacts import read_figure
+from utils.districts import DISTRICT_MAP
+from utils.survey import estimate
 
-    malnutrition_counts = df['malnourished'].value_counts(normalize=True) * 100
+def create_overview_figures():
+    malnourished_pct = estimate("malnourished")["rate"].iloc[0]
     labels = ['Malnourished', 'Not Malnourished']
-    values = [malnutrition_counts.get(True, 0), malnutrition_counts.get(False, 0)]
+    values = [malnourished_pct, 100 - malnourished_pct]
 
     pie_fig = px.pie(
         names=labels,
@@ -38,21 +20,11 @@ def get_layout_overview():
         title="Overall Malnutrition Percentage"
     )
 
-    
-    district_map = {
-        11: "Nyarugenge", 12: "Gasabo", 13: "Kicukiro",
-        21: "Nyanza", 22: "Gisagara", 23: "Nyaruguru", 24: "Huye",
-        25: "Nyamagabe", 26: "Ruhango", 27: "Muhanga", 28: "Kamonyi",
-        31: "Karongi", 32: "Rutsiro", 33: "Rubavu", 34: "Nyabihu", 35: "Ngororero",
-        36: "Rusizi", 37: "Nyamasheke", 41: "Rulindo", 42: "Gakenke",
-        43: "Musanze", 44: "Burera", 45: "Gicumbi", 51: "Rwamagana",
-        52: "Nyagatare", 53: "Gatsibo", 54: "Kayonza", 55: "Kirehe",
-        56: "Ngoma", 57: "Bugesera"
-    }
-
-    malnutrition_by_district = df.groupby('district_code')['malnourished'].mean() * 100
-    malnutrition_by_district = malnutrition_by_district.reset_index()
-    malnutrition_by_district['district_name'] = malnutrition_by_district['district_code'].map(district_map)
+    malnutrition_by_district = estimate("malnourished", by="district").rename_axis("district_code")
+    malnutrition_by_district = malnutrition_by_district.rename(columns={"rate": "malnourished"}).reset_index()
+    malnutrition_by_district["error"] = malnutrition_by_district["ci_high"] - malnutrition_by_district["malnourished"]
+    malnutrition_by_district["error_minus"] = malnutrition_by_district["malnourished"] - malnutrition_by_district["ci_low"]
+    malnutrition_by_district['district_name'] = malnutrition_by_district['district_code'].map(DISTRICT_MAP)
 
     top_10_districts = malnutrition_by_district.sort_values(by='malnourished', ascending=False).head(10)
 
@@ -60,6 +32,8 @@ def get_layout_overview():
         top_10_districts,
         y='district_name',
         x='malnourished',
+        error_x='error',
+        error_x_minus='error_minus',
         title='Top 10 Districts by Malnutrition Percentage',
         labels={'district_name': 'District', 'malnourished': 'Percentage Malnourished'},
         color='district_name',
@@ -73,10 +47,17 @@ def get_layout_overview():
         showlegend=False,
         template='plotly_white'
     )
+    return pie_fig, bar_fig
+
+
+def get_layout_overview():
+    pie_fig, bar_fig = read_figure("overview-pie"), read_figure("overview-bar")
+    if pie_fig is None or bar_fig is None:
+        pie_fig, bar_fig = create_overview_figures()
 
     layout = dbc.Container([
         html.H3("🩺 Malnutrition Overview"),
-        html.P("Overall malnutrition and top districts by prevalence."),
+        html.P("Overall malnutrition and top districts by prevalence (survey-weighted, with 95% confidence intervals)."),
         dbc.Row([
             dbc.Col(dcc.Graph(figure=pie_fig, id="overview-pie-chart"), width=6),
             dbc.Col(dcc.Graph(figure=bar_fig, id="top-districts-bar"), width=6)
@@ -1,5 +1,6 @@
 
-# layouts/recommendations.pyfrom dash import html
+# layouts/recommendations.py
+from dash import html
 import dash_bootstrap_components as dbc
 
 
@@ -1,38 +1,94 @@
+import threading
 
-from dash import html, dcc, Input, Output
+from dash import html, dcc, ClientsideFunction, Input, Output, State
 import dash_bootstrap_components as dbc
-import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
-from scipy.stats import chi2_contingency
 
-df_clean = pd.read_csv("assets/df_clean.csv") 
-
-
-df_clean["stunted"] = (df_clean["height_for_age_zscore"] < -2).astype(int)
+from utils.artifacts import read_figure, read_frame
+from utils.cube import AGE_BANDS, age_band_codes
+from utils.districts import DISTRICT_MAP, REGION_MAP
+from utils.factor_importance import FactorEngine
+from utils.normalize import get_normalized, normalized_version
+from utils.row_index import RowIndex
+from utils.survey import get_estimator
+
+RESIDENCE_MAP = {1: "Urban", 2: "Rural"}
+
+
+class StuntingData:
+    """Filter index, aggregated arrays and factor tables for one df_clean version."""
+
+    def __init__(self, df, version=None):
+        self.version = version
+        age_codes, age_bands = age_band_codes(df["child_current_age_months_b19"])
+        self.row_index = RowIndex({
+            "district": df["district_code"].to_numpy(),
+            "region": df["region_code"].to_numpy(),
+            "residence": df["residence_type"].to_numpy(),
+            "age_band": age_bands[age_codes],
+        })
+        self.stunted = df["stunted"].to_numpy(dtype=np.int8)
+        self.weights = df["weight"].to_numpy(dtype=np.float64)
+        # Integer-coded once; importance(rows) recomputes for any subset of children
+        self.factor_engine = FactorEngine(df)
+        importance_df = read_frame("aggregates/factor_importance-df_clean.parquet")
+        self.importance_df = self.factor_engine.importance() if importance_df is None else importance_df
+        self.factor_bar_fig = read_figure("stunting-factor-bar") or create_factor_bar_chart(self.importance_df)
+
+
+_data = None
+_lock = threading.Lock()
+
+
+def page_data():
+    """Built on first use of the page (or by the warm-up), not at import."""
+    global _data
+    version = normalized_version("df_clean")
+    if _data is None or _data.version != version:
+        with _lock:
+            if _data is None or _data.version != version:
+                _data = StuntingData(get_normalized("df_clean"), version)
+    return _data
+
+
+def selection_summary(rows=None):
+    data = page_data()
+    stunted = data.stunted if rows is None else data.stunted[rows]
+    weights = data.weights if rows is None else data.weights[rows]
+    total = len(stunted)
+    n_stunted = int(stunted.sum())
+    weight_total = weights.sum()
+    weight_stunted = weights @ stunted
+    summary = {
+        "total": total,
+        "stunted": n_stunted,
+        "unweighted_rate": float(n_stunted / total * 100) if total else 0.0,
+        "weighted_rate": float(weight_stunted / weight_total * 100) if weight_total else 0.0,
+        "ci_low": None,
+        "ci_high": None,
+    }
+    if total:
+        ci = get_estimator("df_clean").estimate("stunted", rows=rows).iloc[0]
+        summary["ci_low"], summary["ci_high"] = float(ci["ci_low"]), float(ci["ci_high"])
+    return summary
 
 
-def create_interactive_pie(df):
-    stunting_counts = df["stunted"].value_counts().rename({0: "Not Stunted", 1: "Stunted"})
-    pie_df = stunting_counts.reset_index()
-    pie_df.columns = ["Status", "Count"]
+def create_interactive_pie(summary, scope="National"):
+    labels = ["Not Stunted", "Stunted"]
+    counts = [summary["total"] - summary["stunted"], summary["stunted"]]
 
-    fig = px.pie(
-        pie_df,
-        names="Status",
-        values="Count",
-        color="Status",
-        color_discrete_map={"Not Stunted": "#2ecc71", "Stunted": "#e74c3c"},
-        hover_data=["Count"]
-    )
-    fig.update_traces(
+    fig = go.Figure(go.Pie(
+        labels=labels,
+        values=counts,
+        marker=dict(colors=["#2ecc71", "#e74c3c"]),
+        sort=False,
         textinfo="percent+label",
-        hovertemplate="%{label}: %{value} children (%{percent})"
-    )
+        hovertemplate="%{label}: %{value} children (%{percent})<extra></extra>"
+    ))
     fig.update_layout(
         title=dict(
-            text=f"National Child Stunting Distribution (Unweighted Rate: {df['stunted'].mean() * 100:.1f}%)",
+            text=f"{scope} Child Stunting Distribution (Unweighted Rate: {summary['unweighted_rate']:.1f}%)",
             x=0.5,
             xanchor="center"
         ),
@@ -41,45 +97,19 @@ def create_interactive_pie(df):
     return fig
 
 
-def calculate_factor_importance(df):
-    factors = {
-        "child_sex": "Child Sex",
-        "child_current_age_months_b19": "Child Age (Months)",
-        "mother_education_level": "Maternal Education",
-        "wealth_index": "Wealth Index",
-        "source_of_drinking_water": "Water Source",
-        "toilet_type": "Toilet Facility",
-        "mother_bmi": "Maternal BMI",
-        "region_code": "Region",
-        "mother_hemoglobin_g_dl": "Maternal Hemoglobin",
-        "birth_order": "Birth Order"
-    }
+def create_stats_panel(summary, scope="national"):
+    return [
+        html.P(f"Weighted {scope} stunting rate: {summary['weighted_rate']:.1f}%", className="lead"),
+        html.P(f"95% confidence interval: {summary['ci_low']:.1f}% – {summary['ci_high']:.1f}%")
+        if summary["ci_low"] is not None else None,
+        html.P(f"Unweighted {scope} stunting rate: {summary['unweighted_rate']:.1f}%"),
+        html.P(f"Total children analyzed: {summary['total']}"),
+        html.Hr(),
+    ]
 
-    factor_importance = []
-
-    for col, name in factors.items():
-        if col in df.columns:
-            temp_df = df[[col, "stunted"]].dropna()
-            if len(temp_df) > 0:
-                contingency = pd.crosstab(temp_df[col], temp_df["stunted"])
-                chi2, p, dof, expected = chi2_contingency(contingency)
-                n = contingency.sum().sum()
-                min_dim = min(contingency.shape) - 1
-                cramers_v = np.sqrt(chi2 / (n * min_dim)) if min_dim > 0 else 0
-                stunting_rates = temp_df.groupby(col)["stunted"].mean() * 100
-                diff = stunting_rates.max() - stunting_rates.min()
-                factor_importance.append({
-                    "Factor": name,
-                    "Cramers_V": cramers_v,
-                    "Chi2": chi2,
-                    "P_Value": p,
-                    "Impact_Difference_%": diff,
-                    "Significant": "Yes" if p < 0.05 else "No"
-                })
-
-    importance_df = pd.DataFrame(factor_importance)
-    importance_df = importance_df.sort_values("Impact_Difference_%", ascending=False)
-    return importance_df
+
+def calculate_factor_importance(df):
+    return FactorEngine(df).importance()
 
 
 def create_factor_bar_chart(importance_df, top_n=10):
@@ -102,25 +132,38 @@ def create_factor_bar_chart(importance_df, top_n=10):
     )
     return fig
 
-importance_df = calculate_factor_importance(df_clean)
-factor_bar_fig = create_factor_bar_chart(importance_df)
+
+def _filter_dropdown(id, label, options):
+    return dbc.Col([
+        dbc.Label(label),
+        dcc.Dropdown(id=id, options=options, multi=True, placeholder="All")
+    ], md=3)
 
 
 def get_layout():
-    weighted_rate = (df_clean["stunted"] * df_clean["weight"]).sum() / df_clean["weight"].sum() * 100
-    unweighted_rate = df_clean["stunted"].mean() * 100
-    total_records = len(df_clean)
+    summary = selection_summary()
 
     layout = dbc.Container([
         html.H3("Stunting Analysis in Rwanda", className="text-center mb-4"),
 
-    
+        dbc.Row([
+            _filter_dropdown("stunting-filter-district", "District",
+                             [{"label": n, "value": c} for c, n in sorted(DISTRICT_MAP.items(), key=lambda x: x[1])]),
+            _filter_dropdown("stunting-filter-region", "Region",
+                             [{"label": n, "value": c} for c, n in REGION_MAP.items()]),
+            _filter_dropdown("stunting-filter-residence", "Residence",
+                             [{"label": n, "value": c} for c, n in RESIDENCE_MAP.items()]),
+            _filter_dropdown("stunting-filter-age", "Age (months)",
+                             [{"label": b, "value": b} for b in AGE_BANDS]),
+        ], className="mb-4"),
+        dcc.Store(id="stunting-selection", data=summary),
+
         dbc.Row([
             dbc.Col(
                 dbc.Card([
                     dbc.CardHeader("Stunting Overview"),
                     dbc.CardBody([
-                        dcc.Graph(id="stunting-pie", figure=create_interactive_pie(df_clean)),
+                        dcc.Graph(id="stunting-pie", figure=create_interactive_pie(summary)),
                         html.Div(id="stunting-click-info",
                                  style={"marginTop": "10px", "fontWeight": "bold", "textAlign": "center"})
                     ])
@@ -130,13 +173,8 @@ def get_layout():
 
             dbc.Col(
                 dbc.Card([
-                    dbc.CardHeader("National Statistics"),
-                    dbc.CardBody([
-                        html.P(f"Weighted national stunting rate: {weighted_rate:.1f}%", className="lead"),
-                        html.P(f"Unweighted national stunting rate: {unweighted_rate:.1f}%"),
-                        html.P(f"Total children analyzed: {total_records}"),
-                        html.Hr(),
-                    ])
+                    dbc.CardHeader("National Statistics", id="stunting-stats-header"),
+                    dbc.CardBody(create_stats_panel(summary), id="stunting-stats")
                 ]),
                 md=6
             )
@@ -147,7 +185,7 @@ def get_layout():
                 dbc.Card([
                     dbc.CardHeader("Risk Factor Importance"),
                     dbc.CardBody([
-                        dcc.Graph(id="factor-bar", figure=factor_bar_fig)
+                        dcc.Graph(id="factor-bar", figure=page_data().factor_bar_fig)
                     ])
                 ])
             )
@@ -158,17 +196,45 @@ def get_layout():
 
 def register_callbacks_stunting(app):
     @app.callback(
+        Output("stunting-pie", "figure"),
+        Output("stunting-stats", "children"),
+        Output("stunting-stats-header", "children"),
+        Output("factor-bar", "figure"),
+        Output("stunting-selection", "data"),
+        Output("stunting-click-info", "children", allow_duplicate=True),
+        Input("stunting-filter-district", "value"),
+        Input("stunting-filter-region", "value"),
+        Input("stunting-filter-residence", "value"),
+        Input("stunting-filter-age", "value"),
+        prevent_initial_call=True
+    )
+    def filter_stunting(districts, regions, residence, age_bands):
+        data = page_data()
+        rows = data.row_index.select(district=districts, region=regions,
+                                residence=residence, age_band=age_bands)
+        if rows is None:
+            summary = selection_summary()
+            return (create_interactive_pie(summary), create_stats_panel(summary),
+                    "National Statistics", data.factor_bar_fig, summary, "")
+
+        summary = selection_summary(rows)
+        if summary["total"] == 0:
+            empty = go.Figure()
+            empty.update_layout(title="No children match the selected filters")
+            return empty, create_stats_panel(summary, "selected"), "Selected Children", empty, summary, ""
+        return (
+            create_interactive_pie(summary, "Selected"),
+            create_stats_panel(summary, "selected"),
+            "Selected Children",
+            create_factor_bar_chart(data.factor_engine.importance(rows)),
+            summary,
+            ""
+        )
+
+    # Runs in the browser from the summary already in the page (assets/clientside.js)
+    app.clientside_callback(
+        ClientsideFunction(namespace="ui", function_name="display_click_info"),
         Output("stunting-click-info", "children"),
-        Input("stunting-pie", "clickData")
+        Input("stunting-pie", "clickData"),
+        State("stunting-selection", "data")
     )
-    def display_click_info(clickData):
-        if clickData is None:
-            return ""
-        label = clickData["points"][0]["label"]
-        if label == "Stunted":
-            count = df_clean["stunted"].sum()
-            weighted = (df_clean.loc[df_clean["stunted"] == 1, "weight"].sum() / df_clean["weight"].sum()) * 100
-        else:
-            count = len(df_clean) - df_clean["stunted"].sum()
-            weighted = (df_clean.loc[df_clean["stunted"] == 0, "weight"].sum() / df_clean["weight"].sum()) * 100
-        return f"{label} children: {count:,} ({weighted:.1f}% weighted)"
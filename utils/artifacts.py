@@ -0,0 +1,122 @@
+# utils/artifacts.py
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.data_registry import BASE_DIR, file_hash
+
+# Output of `python -m build_artifacts`; the app prefers it whenever it is current
+BUILD_DIR = os.environ.get("NISR_BUILD_DIR", os.path.join(BASE_DIR, "build"))
+USE_ARTIFACTS = os.environ.get("NISR_USE_ARTIFACTS", "1") != "0"
+MANIFEST = "manifest.json"
+# 2: map figures reference the district GeoJSON by URL instead of inline
+FORMAT_VERSION = 2
+
+_cache = {}
+_hashes = {}
+_lock = threading.RLock()
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def manifest():
+    """The build manifest, re-read when it changes on disk; None without a build."""
+    path = os.path.join(BUILD_DIR, MANIFEST)
+    stamp = _stamp(path)
+    if not USE_ARTIFACTS or stamp is None:
+        return None
+    with _lock:
+        cached = _cache.get(MANIFEST)
+        if cached is None or cached[0] != stamp:
+            with open(path) as f:
+                data = json.load(f)
+            # Imported here: utils.normalize itself reads artifacts
+            from utils.normalize import NORMALIZE_VERSION
+            if data.get("format") != FORMAT_VERSION or data.get("normalize_version") != NORMALIZE_VERSION:
+                print(f"⚠️ Ignoring build in {BUILD_DIR}: made by an incompatible version, rebuild it")
+                data = None
+            # A new build invalidates everything loaded from the old one
+            _cache.clear()
+            _cache[MANIFEST] = (stamp, data)
+        return _cache[MANIFEST][1]
+
+
+def _input_current(entry):
+    """True if the input is absent (artifact-only deploy) or unchanged."""
+    path = os.path.join(BASE_DIR, entry["path"]) if not os.path.isabs(entry["path"]) else entry["path"]
+    stamp = _stamp(path)
+    if stamp is None:
+        return True
+    key = (path, stamp)
+    if key not in _hashes:
+        _hashes[key] = file_hash(path)
+    return _hashes[key] == entry["sha256"]
+
+
+def available(name):
+    """Path of a built artifact whose inputs are all current, else None."""
+    data = manifest()
+    if data is None or name not in data["artifacts"]:
+        return None
+    inputs = data["artifacts"][name].get("inputs", [])
+    if not all(_input_current(data["inputs"][key]) for key in inputs):
+        return None
+    return os.path.join(BUILD_DIR, name)
+
+
+def input_hash(key):
+    data = manifest()
+    return data["inputs"][key]["sha256"] if data and key in data["inputs"] else None
+
+
+def _load(name, read):
+    path = available(name)
+    if path is None:
+        return None
+    with _lock:
+        if name not in _cache:
+            _cache[name] = read(path)
+        return _cache[name]
+
+
+def read_frame(name):
+    frame = _load(name, pd.read_parquet)
+    return None if frame is None else frame.copy(deep=False)
+
+
+def read_json(name):
+    def read(path):
+        with open(path) as f:
+            return json.load(f)
+    return _load(name, read)
+
+
+def read_bytes(name):
+    def read(path):
+        with open(path, "rb") as f:
+            return f.read()
+    return _load(name, read)
+
+
+def read_arrays(name):
+    return _load(name, lambda path: dict(np.load(path, allow_pickle=False)))
+
+
+def read_figure(name):
+    """A serialized plotly figure as a dict, ready for dcc.Graph(figure=...)."""
+    return read_json(f"figures/{name}.json")
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+        _hashes.clear()
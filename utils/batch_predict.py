@@ -0,0 +1,90 @@
+# utils/batch_predict.py
+import io
+import os
+
+import numpy as np
+import pandas as pd
+from flask import Response, request
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 5000
+MAX_UPLOAD_ROWS = 1_000_000
+OUTPUT_COLUMNS = ["stunting_probability", "stunting_predicted"]
+
+
+def read_table(data, filename=""):
+    """Parse uploaded bytes as Parquet (by extension or magic bytes) or CSV."""
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext in (".parquet", ".pq") or data[:4] == b"PAR1":
+        return pd.read_parquet(io.BytesIO(data))
+    return pd.read_csv(io.BytesIO(data))
+
+
+def validate_features(df, features):
+    missing = [f for f in features if f not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    if len(df) > MAX_UPLOAD_ROWS:
+        raise ValueError(f"Too many rows: {len(df):,} (limit {MAX_UPLOAD_ROWS:,})")
+    return df[features].apply(pd.to_numeric, errors="coerce")
+
+
+def iter_scored_chunks(clf, df, X, chunk_size=CHUNK_SIZE):
+    """Yield the input frame in chunks with probability and label columns added.
+
+    `X` is the feature matrix from validate_features. Each chunk costs one
+    predict_proba call on a block of rows.
+    """
+    for start in range(0, len(df), chunk_size):
+        stop = start + chunk_size
+        prob = clf.predict_proba(X.iloc[start:stop])[:, 1]
+        chunk = df.iloc[start:stop].copy()
+        chunk["stunting_probability"] = prob
+        chunk["stunting_predicted"] = (prob > 0.5).astype(np.int8)
+        yield chunk
+
+
+def score_frame(clf, df, features, chunk_size=CHUNK_SIZE):
+    chunks = list(iter_scored_chunks(clf, df, validate_features(df, features), chunk_size))
+    if not chunks:
+        return df.assign(**{col: pd.Series(dtype=float) for col in OUTPUT_COLUMNS})
+    return pd.concat(chunks)
+
+
+def iter_scored_csv(clf, df, X, chunk_size=CHUNK_SIZE):
+    header = True
+    for chunk in iter_scored_chunks(clf, df, X, chunk_size):
+        yield chunk.to_csv(index=False, header=header)
+        header = False
+
+
+def register_batch_route(server, get_model, features, route="/api/predict/batch"):
+    """Add a POST route that scores an uploaded CSV/Parquet file.
+
+    Send the file as multipart field `file` (or as the raw request body);
+    the scored CSV is streamed back chunk by chunk.
+    """
+    @server.route(route, methods=["POST"])
+    def predict_batch():
+        clf = get_model()
+        if clf is None:
+            return Response("Model not loaded\n", status=503, mimetype="text/plain")
+
+        upload = request.files.get("file")
+        data = upload.read() if upload else request.get_data()
+        filename = upload.filename if upload else request.args.get("filename", "")
+        try:
+            df = read_table(data, filename)
+            X = validate_features(df, features)
+        except Exception as e:
+            return Response(f"Invalid upload: {e}\n", status=400, mimetype="text/plain")
+
+        # The name comes from the client: keep only [A-Za-z0-9_.-] for the header
+        stem = os.path.splitext(secure_filename(filename or ""))[0] or "batch"
+        return Response(
+            iter_scored_csv(clf, df, X),
+            mimetype="text/csv",
+            headers={"Content-Disposition": f'attachment; filename="{stem}_scored.csv"'},
+        )
+
+    return predict_batch
@@ -0,0 +1,83 @@
+# utils/chat_history.py
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from flask import jsonify
+
+# Messages kept per conversation (each exchange adds two) and shown in the box
+WINDOW = int(os.environ.get("NISR_CHAT_WINDOW", "40"))
+MAX_SESSIONS = int(os.environ.get("NISR_CHAT_SESSIONS", "2000"))
+SESSION_TTL = float(os.environ.get("NISR_CHAT_TTL", "3600"))
+
+
+class ChatHistory:
+    """Server-side chat transcripts: the last `window` messages per session.
+
+    Sessions are held in LRU order and dropped after `ttl` seconds idle or
+    when more than `max_sessions` are open. The chat box is refilled from
+    the transcript when the page is reloaded. Each worker keeps the
+    sessions it served, so a reload answered by another worker starts
+    with an empty box; new messages still work.
+    """
+
+    def __init__(self, window=WINDOW, max_sessions=MAX_SESSIONS, ttl=SESSION_TTL):
+        self.window = window
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self.messages = self.evicted_sessions = self.expired_sessions = 0
+
+    @staticmethod
+    def new_session():
+        return uuid.uuid4().hex
+
+    def _expire(self, now):
+        while self._sessions:
+            session, (_, seen) = next(iter(self._sessions.items()))
+            if now - seen <= self.ttl:
+                break
+            del self._sessions[session]
+            self.expired_sessions += 1
+
+    def append(self, session, *messages):
+        """Add (role, text) messages to a session, oldest falling out of the window."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.pop(session, None)
+            transcript = entry[0] if entry else deque(maxlen=self.window)
+            transcript.extend(messages)
+            self._sessions[session] = (transcript, now)
+            self.messages += len(messages)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted_sessions += 1
+
+    def get(self, session):
+        with self._lock:
+            entry = self._sessions.get(session)
+            return list(entry[0]) if entry else []
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "window": self.window,
+                "ttl_seconds": self.ttl,
+                "messages": self.messages,
+                "evicted_sessions": self.evicted_sessions,
+                "expired_sessions": self.expired_sessions,
+            }
+
+
+def register_chat_route(server, history, route="/api/chat-history"):
+    @server.route(route)
+    def chat_history_stats():
+        return jsonify(history.stats())
+
+    return chat_history_stats
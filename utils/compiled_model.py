@@ -0,0 +1,213 @@
+# utils/compiled_model.py
+import numpy as np
+import pandas as pd
+
+TOLERANCE = 1e-9
+
+
+def _scaler_params(transformer, n_cols):
+    """Mean and scale for a StandardScaler (or passthrough) block."""
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    if isinstance(transformer, Pipeline):
+        if len(transformer.steps) != 1:
+            raise ValueError("Only single-step preprocessing pipelines can be compiled")
+        transformer = transformer.steps[0][1]
+    if transformer == "passthrough":
+        return np.zeros(n_cols), np.ones(n_cols)
+    if not isinstance(transformer, StandardScaler):
+        raise ValueError(f"Cannot compile preprocessing step {type(transformer).__name__}")
+    mean = transformer.mean_ if transformer.with_mean else np.zeros(n_cols)
+    scale = transformer.scale_ if transformer.with_std else np.ones(n_cols)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+
+def _leaf_ranges(nodes):
+    """In-order leaf rank of every leaf and the leaf range under each left child."""
+    rank = np.full(len(nodes), -1)
+    left_range = np.zeros((len(nodes), 2), dtype=np.int64)
+    counter = 0
+
+    def walk(i):
+        nonlocal counter
+        if nodes["is_leaf"][i]:
+            rank[i] = counter
+            counter += 1
+            return
+        lo = counter
+        walk(nodes["left"][i])
+        left_range[i] = lo, counter
+        walk(nodes["right"][i])
+
+    walk(0)
+    return rank, left_range, counter
+
+
+class CompiledModel:
+    """NumPy re-implementation of a scaled HistGradientBoosting pipeline.
+
+    Uses the QuickScorer layout: leaves of each tree are numbered left to
+    right, and a split that sends a row right removes the leaves of its left
+    subtree from a per-tree 64-bit mask. Per feature, the masks for every
+    threshold interval (plus one for NaN) are pre-ANDed into a table, so a
+    batch is scored with one searchsorted and one table lookup per feature;
+    the exit leaf is the lowest bit left set. Exposes `predict_proba` and
+    `predict` with the same inputs as the scikit-learn pipeline.
+    """
+
+    def __init__(self, pipeline):
+        # scikit-learn is only needed to compile; a compiled model loads without it
+        from sklearn.compose import ColumnTransformer
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        from sklearn.pipeline import Pipeline
+
+        steps = dict(pipeline.steps) if isinstance(pipeline, Pipeline) else {"clf": pipeline}
+        clf = pipeline.steps[-1][1] if isinstance(pipeline, Pipeline) else pipeline
+        if not isinstance(clf, HistGradientBoostingClassifier) or clf.n_trees_per_iteration_ != 1:
+            raise ValueError("Only binary HistGradientBoostingClassifier models can be compiled")
+
+        self.feature_names_in_ = np.asarray(getattr(pipeline, "feature_names_in_", []), dtype=object)
+        self.classes_ = clf.classes_
+        n_in = len(self.feature_names_in_)
+
+        # Map the ColumnTransformer output back onto input columns
+        preproc = [s for name, s in steps.items() if isinstance(s, ColumnTransformer)]
+        columns, mean, scale = [], [], []
+        if preproc:
+            names = list(self.feature_names_in_)
+            for _, transformer, cols in preproc[0].transformers_:
+                if transformer == "drop" or len(cols) == 0:
+                    continue
+                m, s = _scaler_params(transformer, len(cols))
+                columns.extend(names.index(c) if isinstance(c, str) else int(c) for c in cols)
+                mean.append(m)
+                scale.append(s)
+            mean, scale = np.concatenate(mean), np.concatenate(scale)
+        else:
+            columns = list(range(n_in or clf.n_features_in_))
+            mean, scale = np.zeros(len(columns)), np.ones(len(columns))
+        self.columns = np.asarray(columns, dtype=np.intp)
+        self.mean = mean
+        self.scale = scale
+
+        trees = [predictors[0].nodes for predictors in clf._predictors]
+        if any(nodes["is_categorical"].any() for nodes in trees):
+            raise ValueError("Categorical splits are not supported by the compiled predictor")
+        n_trees = len(trees)
+        self.baseline = float(np.ravel(clf._baseline_prediction)[0])
+
+        # Split nodes of all trees: (tree, feature, threshold, missing_left, mask)
+        full = np.uint64(0xFFFFFFFFFFFFFFFF)
+        leaf_values = []
+        split_tree, split_feature, split_threshold, split_missing_left, split_mask = [], [], [], [], []
+        for t, nodes in enumerate(trees):
+            rank, left_range, n_leaves = _leaf_ranges(nodes)
+            if n_leaves > 64:
+                raise ValueError("Trees with more than 64 leaves cannot be compiled")
+            values = np.zeros(64)
+            values[rank[rank >= 0]] = nodes["value"][rank >= 0]
+            leaf_values.append(values)
+            for i in np.flatnonzero(~nodes["is_leaf"].astype(bool)):
+                lo, hi = left_range[i]
+                left_bits = ((1 << int(hi)) - 1) ^ ((1 << int(lo)) - 1)
+                split_tree.append(t)
+                split_feature.append(nodes["feature_idx"][i])
+                split_threshold.append(nodes["num_threshold"][i])
+                split_missing_left.append(bool(nodes["missing_go_to_left"][i]))
+                split_mask.append(np.uint64(left_bits) ^ full)
+        self.leaf_values = np.asarray(leaf_values)
+        split_tree = np.asarray(split_tree, dtype=np.intp)
+        split_feature = np.asarray(split_feature, dtype=np.intp)
+        split_threshold = np.asarray(split_threshold, dtype=np.float64)
+        split_missing_left = np.asarray(split_missing_left, dtype=bool)
+        split_mask = np.asarray(split_mask, dtype=np.uint64)
+
+        # Per feature: sorted finite thresholds and the pre-ANDed mask table.
+        # Row b holds the masks of every split with threshold < x for x in
+        # interval b; the last row is for NaN inputs.
+        self.tables = []
+        for pos in np.unique(split_feature):
+            on = split_feature == pos
+            finite = on & np.isfinite(split_threshold)
+            edges, which = np.unique(split_threshold[finite], return_inverse=True)
+            rows = np.full((len(edges), n_trees), full, dtype=np.uint64)
+            np.bitwise_and.at(rows, (which, split_tree[finite]), split_mask[finite])
+            table = np.full((len(edges) + 2, n_trees), full, dtype=np.uint64)
+            table[1:len(edges) + 1] = np.bitwise_and.accumulate(rows, axis=0)
+            to_right = on & ~split_missing_left
+            np.bitwise_and.at(table[-1], split_tree[to_right], split_mask[to_right])
+            self.tables.append((int(pos), edges, table))
+        self.n_trees = n_trees
+
+    def _as_array(self, X):
+        if isinstance(X, pd.DataFrame):
+            if len(self.feature_names_in_):
+                X = X[list(self.feature_names_in_)]
+            try:
+                X = X.to_numpy(dtype=np.float64, na_value=np.nan)
+            except (TypeError, ValueError):
+                X = X.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        X = np.asarray(X, dtype=np.float64)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def decision_function(self, X):
+        X = self._as_array(X)
+        X = (X[:, self.columns] - self.mean) / self.scale
+
+        alive = np.full((len(X), self.n_trees), np.uint64(0xFFFFFFFFFFFFFFFF), dtype=np.uint64)
+        for pos, edges, table in self.tables:
+            x = X[:, pos]
+            interval = np.searchsorted(edges, x, side="left")
+            interval[np.isnan(x)] = len(table) - 1
+            alive &= table[interval]
+
+        # Exit leaf = lowest surviving bit; its exponent is the leaf rank
+        lowest = alive & (~alive + np.uint64(1))
+        leaf = np.frexp(lowest.astype(np.float64))[1] - 1
+        leaf_values = self.leaf_values[np.arange(self.n_trees), leaf]
+
+        # cumsum adds trees one at a time, in the same order as scikit-learn,
+        # which keeps the result bit-identical (np.sum would pair them up)
+        terms = np.column_stack([np.full(len(X), self.baseline), leaf_values])
+        return np.cumsum(terms, axis=1)[:, -1]
+
+    def predict_proba(self, X):
+        from scipy.special import expit
+
+        p = expit(self.decision_function(X))
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+
+def probe_inputs(compiled, n=2000, seed=0):
+    """Rows built from the model's own split thresholds, NaNs included."""
+    rng = np.random.default_rng(seed)
+    n_in = len(compiled.feature_names_in_) or int(compiled.columns.max()) + 1
+    X = rng.normal(size=(n, n_in))
+    for pos, edges, _ in compiled.tables:
+        if len(edges):
+            picks = rng.choice(edges, n) + rng.choice([-1e-6, 0.0, 1e-6], n)
+            X[:, compiled.columns[pos]] = picks * compiled.scale[pos] + compiled.mean[pos]
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X
+
+
+def verify(compiled, pipeline, X=None):
+    """Largest absolute probability difference against the scikit-learn model."""
+    if X is None:
+        X = probe_inputs(compiled)
+    if not isinstance(X, pd.DataFrame) and len(compiled.feature_names_in_):
+        X = pd.DataFrame(X, columns=compiled.feature_names_in_)
+    return float(np.abs(compiled.predict_proba(X) - pipeline.predict_proba(X)).max())
+
+
+def compile_model(pipeline, tolerance=TOLERANCE):
+    """Compile a fitted pipeline, refusing if it disagrees with predict_proba."""
+    compiled = CompiledModel(pipeline)
+    diff = verify(compiled, pipeline)
+    if diff > tolerance:
+        raise ValueError(f"Compiled model differs from predict_proba by {diff:.3g}")
+    return compiled
@@ -0,0 +1,98 @@
+# utils/compression.py
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_BYTES = int(os.environ.get("NISR_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("NISR_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.environ.get("NISR_BROTLI_QUALITY", "5"))
+# Compressed bodies kept for reuse: the Dash bundles, static files and any
+# cached page render come back byte for byte
+CACHE_SIZE = int(os.environ.get("NISR_COMPRESS_CACHE_SIZE", "128"))
+
+COMPRESSIBLE = {
+    "application/json", "application/javascript", "application/geo+json",
+    "image/svg+xml", "text/html", "text/css", "text/javascript", "text/plain",
+}
+
+
+def encodings():
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def choose_encoding(accept_encodings):
+    """Best encoding we support that the client accepts, or None."""
+    for encoding in encodings():
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionCache:
+    """Small LRU of compressed bodies keyed by encoding, length and a 128-bit BLAKE2b digest."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, data, encoding):
+        key = (encoding, len(data), hashlib.blake2b(data, digest_size=16).digest())
+        with self._lock:
+            body = self._lru.get(key)
+            if body is not None:
+                self._lru.move_to_end(key)
+                return body
+        body = compress(data, encoding)
+        with self._lock:
+            self._lru[key] = body
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return body
+
+
+def register_compression(server, min_bytes=MIN_BYTES):
+    """gzip (or brotli, when installed) every compressible response above min_bytes."""
+    cache = CompressionCache()
+
+    @server.after_request
+    def compress_response(response):
+        if (response.status_code != 200 or response.mimetype not in COMPRESSIBLE
+                or "Content-Encoding" in response.headers
+                or (response.is_streamed and not response.direct_passthrough)):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        # File responses (send_file) are read into memory to compress them
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+        response.set_data(cache.get(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        # Same content in another encoding: keep the ETag, but weak
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    return compress_response
@@ -0,0 +1,188 @@
+# utils/cube.py
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.artifacts import read_arrays
+from utils.normalize import get_normalized, measured, normalized_version
+
+INDICATORS = ("stunted", "wasted", "underweight", "malnourished")
+
+DIMENSIONS = {
+    "district": "district_code",
+    "region": "region_code",
+    "sex": "child_sex",
+    "age_band": "child_current_age_months_b19",
+    "wealth": "wealth_index",
+}
+
+AGE_BAND_EDGES = [6, 12, 24, 36, 48]
+AGE_BANDS = ["0-5", "6-11", "12-23", "24-35", "36-47", "48-59"]
+# Children with no recorded age get their own band rather than "0-5"
+UNKNOWN_AGE = "unknown"
+
+
+class DistrictCube:
+    """Pre-summed counts and indicator tallies on a dense NumPy grid.
+
+    Axes follow DIMENSIONS; `levels[dim]` holds the code behind each position
+    (age bands are labelled by AGE_BANDS). Measures are `count`, `weight`,
+    `measured` (children with a valid height-for-age z-score) and, for every
+    indicator, its tally plus a `<indicator>_weight` weighted tally.
+    """
+
+    def __init__(self, levels, measures, version=None):
+        self.levels = levels
+        self.measures = measures
+        self.version = version
+        self.dims = list(levels)
+
+    def to_arrays(self):
+        arrays = {f"level:{dim}": levels for dim, levels in self.levels.items()}
+        arrays.update({f"measure:{name}": values for name, values in self.measures.items()})
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, version=None):
+        levels = {dim: arrays[f"level:{dim}"] for dim in DIMENSIONS if f"level:{dim}" in arrays}
+        measures = {key.split(":", 1)[1]: arrays[key] for key in arrays if key.startswith("measure:")}
+        return cls(levels, measures, version)
+
+    def _axis_positions(self, dim, values):
+        levels = self.levels[dim]
+        if np.isscalar(values) or isinstance(values, str):
+            values = [values]
+        positions = [int(np.flatnonzero(levels == v)[0]) for v in values if (levels == v).any()]
+        return np.asarray(positions, dtype=np.intp)
+
+    def slice(self, **filters):
+        levels = dict(self.levels)
+        measures = dict(self.measures)
+        for dim, values in filters.items():
+            if values is None:
+                continue
+            axis = self.dims.index(dim)
+            positions = self._axis_positions(dim, values)
+            levels[dim] = levels[dim][positions]
+            measures = {name: np.take(arr, positions, axis=axis) for name, arr in measures.items()}
+        return DistrictCube(levels, measures, self.version)
+
+    def _sum(self, measure, by):
+        keep = [self.dims.index(dim) for dim in by]
+        drop = tuple(i for i in range(len(self.dims)) if i not in keep)
+        return self.measures[measure].sum(axis=drop)
+
+    def _index(self, by):
+        if len(by) == 1:
+            return pd.Index(self.levels[by[0]], name=by[0])
+        return pd.MultiIndex.from_product([self.levels[dim] for dim in by], names=list(by))
+
+    def rollup(self, measure, by=(), **filters):
+        """Sum a measure over every dimension not in `by`."""
+        cube = self.slice(**filters) if filters else self
+        by = (by,) if isinstance(by, str) else tuple(by)
+        totals = cube._sum(measure, by)
+        if not by:
+            return totals.item()
+        return pd.Series(totals.ravel(), index=cube._index(by), name=measure)
+
+    def rate(self, indicator, by=(), weighted=False, denominator="count", **filters):
+        """Prevalence of an indicator in percent, optionally broken down `by`.
+
+        The default denominator counts every child, as the pages always have;
+        pass denominator="measured" to restrict to children with valid z-scores.
+        Cells with no children are left out of the result.
+        """
+        cube = self.slice(**filters) if filters else self
+        by = (by,) if isinstance(by, str) else tuple(by)
+        num, den = indicator, denominator
+        if weighted:
+            num, den = f"{indicator}_weight", "weight" if denominator == "count" else "measured_weight"
+        tallies = cube._sum(num, by).ravel()
+        totals = cube._sum(den, by).ravel()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = tallies / totals * 100
+        if not by:
+            return rates.item() if totals.item() else np.nan
+        keep = totals > 0
+        return pd.Series(rates[keep], index=cube._index(by)[keep], name=indicator)
+
+
+def indicator_flags(df):
+    """Per-row indicator flags of a normalized frame, plus which children were measured."""
+    return {name: df[name].to_numpy(dtype=bool) for name in INDICATORS}, measured(df)
+
+
+def sample_weights(df):
+    if "sample_weight_v005" in df.columns:
+        return df["sample_weight_v005"].to_numpy(dtype=float) / 1_000_000
+    return df["weight"].to_numpy(dtype=float)
+
+
+def age_band_codes(ages):
+    """Band positions for ages in months, with missing ages in a trailing UNKNOWN_AGE band."""
+    ages = pd.to_numeric(pd.Series(ages), errors="coerce").to_numpy(dtype=float)
+    codes = np.digitize(ages, AGE_BAND_EDGES)
+    missing = np.isnan(ages) | (ages < 0)
+    if not missing.any():
+        return codes, np.asarray(AGE_BANDS)
+    codes[missing] = len(AGE_BANDS)
+    return codes, np.asarray(AGE_BANDS + [UNKNOWN_AGE])
+
+
+def build_cube(df, version=None):
+    """Cube over a normalized frame (see utils.normalize)."""
+    flags, measured = indicator_flags(df)
+    weight = sample_weights(df)
+
+    levels, positions = {}, []
+    for dim, col in DIMENSIONS.items():
+        if dim == "age_band":
+            index, levels[dim] = age_band_codes(df[col])
+        else:
+            values = pd.to_numeric(df[col], errors="coerce").fillna(-1).astype(int).to_numpy()
+            levels[dim], index = np.unique(values, return_inverse=True)
+        positions.append(index)
+
+    shape = tuple(len(levels[dim]) for dim in DIMENSIONS)
+    flat = np.ravel_multi_index(positions, shape)
+    size = int(np.prod(shape))
+
+    def tally(mask=None, w=None):
+        cells = flat if mask is None else flat[mask]
+        w = None if w is None else (w if mask is None else w[mask])
+        out = np.bincount(cells, weights=w, minlength=size).reshape(shape)
+        return out.astype(np.float64) if w is not None else out.astype(np.int32)
+
+    measures = {
+        "count": tally(),
+        "weight": tally(w=weight),
+        "measured": tally(measured),
+        "measured_weight": tally(measured, weight),
+    }
+    for name in INDICATORS:
+        measures[name] = tally(flags[name])
+        measures[f"{name}_weight"] = tally(flags[name], weight)
+    return DistrictCube(levels, measures, version)
+
+
+_cubes = {}
+_lock = threading.Lock()
+
+
+def get_cube(source="nisr"):
+    """Return the cube for a registry source, rebuilt only when the data changes."""
+    version = normalized_version(source)
+    cube = _cubes.get(source)
+    if cube is None or cube.version != version:
+        with _lock:
+            cube = _cubes.get(source)
+            if cube is None or cube.version != version:
+                arrays = read_arrays(f"aggregates/cube-{source}.npz")
+                if arrays is not None:
+                    cube = DistrictCube.from_arrays(arrays, version)
+                else:
+                    cube = build_cube(get_normalized(source), version)
+                _cubes[source] = cube
+    return cube
@@ -0,0 +1,129 @@
+# utils/data_registry.py
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+CACHE_DIR = os.environ.get("NISR_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "datasets"))
+
+# Named sources; any other CSV path can be passed to get_dataset directly
+DATASETS = {
+    "nisr": os.path.join(BASE_DIR, "assets", "nisr_dataset1.csv"),
+    "df_clean": os.path.join(BASE_DIR, "assets", "df_clean.csv"),
+    "children_nutrition": os.path.join(BASE_DIR, "children_nutrition_with_district.csv"),
+}
+
+try:
+    import pyarrow  # noqa: F401
+    CACHE_FORMAT = "parquet"
+except ImportError:
+    CACHE_FORMAT = "pkl"
+
+_entries = {}
+_lock = threading.Lock()
+
+
+def resolve_path(source):
+    return os.path.abspath(DATASETS.get(source, source))
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reader_tag(reader):
+    return None if reader is None else getattr(reader, "cache_tag", reader.__name__)
+
+
+def _cache_path(path, digest, reader=None):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    tag = _reader_tag(reader)
+    if tag:
+        stem = f"{stem}-{tag}"
+    return os.path.join(CACHE_DIR, f"{stem}-{digest[:16]}.{CACHE_FORMAT}")
+
+
+def _read_cached(cache_path):
+    if CACHE_FORMAT == "parquet":
+        return pd.read_parquet(cache_path)
+    return pd.read_pickle(cache_path)
+
+
+def _write_cached(df, cache_path):
+    # Several gunicorn workers may build the same file: write then rename atomically
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        if CACHE_FORMAT == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # A read-only deploy dir only costs us the columnar copy, not the data
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load(path, digest, reader=None):
+    cache_path = _cache_path(path, digest, reader)
+    if os.path.exists(cache_path):
+        try:
+            return _read_cached(cache_path)
+        except Exception:
+            pass
+    df = pd.read_csv(path) if reader is None else reader(path)
+    _write_cached(df, cache_path)
+    return df
+
+
+def _entry(source, reader=None):
+    path = resolve_path(source)
+    st = os.stat(path)
+    stamp = (st.st_mtime_ns, st.st_size)
+    key = (path, _reader_tag(reader))
+
+    entry = _entries.get(key)
+    if entry is not None and entry["stamp"] == stamp:
+        return entry
+
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry["stamp"] == stamp:
+            return entry
+        digest = file_hash(path)
+        if entry is not None and entry["hash"] == digest:
+            # Touched but unchanged: keep the loaded frame
+            entry = dict(entry, stamp=stamp)
+        else:
+            entry = {"stamp": stamp, "hash": digest, "df": _load(path, digest, reader)}
+        _entries[key] = entry
+        return entry
+
+
+def get_dataset(source, reader=None):
+    """Return a read-only DataFrame for a named source or CSV path.
+
+    The CSV is parsed once per process (or read from its columnar cache) and
+    reloaded automatically when the file on disk changes. `reader(path)`
+    replaces pd.read_csv; its frame is cached separately, under the
+    reader's `cache_tag` attribute (or its name).
+    """
+    # pandas >= 3 (requirements.txt) is always copy-on-write, so this shallow
+    # copy is a read-only view of the cached frame: writes land in the caller's copy
+    return _entry(source, reader)["df"].copy(deep=False)
+
+
+def dataset_version(source, reader=None):
+    return _entry(source, reader)["hash"]
+
+
+def clear():
+    with _lock:
+        _entries.clear()
@@ -0,0 +1,102 @@
+# utils/factor_importance.py
+import numpy as np
+import pandas as pd
+
+FACTORS = {
+    "child_sex": "Child Sex",
+    "child_current_age_months_b19": "Child Age (Months)",
+    "mother_education_level": "Maternal Education",
+    "wealth_index": "Wealth Index",
+    "source_of_drinking_water": "Water Source",
+    "toilet_type": "Toilet Facility",
+    "mother_bmi": "Maternal BMI",
+    "region_code": "Region",
+    "mother_hemoglobin_g_dl": "Maternal Hemoglobin",
+    "birth_order": "Birth Order"
+}
+
+COLUMNS = ["Factor", "Cramers_V", "Chi2", "P_Value", "Impact_Difference_%", "Significant"]
+
+
+class FactorEngine:
+    """Chi-square / Cramér's V importance of every factor in one pass.
+
+    Factor columns are integer-coded once. Each call stacks the codes of
+    all factors (offset so they do not collide) with the binary outcome and
+    builds every factor x outcome contingency table from a single
+    np.bincount. The statistics are then computed for all factors together.
+    `rows` restricts the computation to a subset of row positions.
+    """
+
+    def __init__(self, df, factors=FACTORS, outcome="stunted"):
+        self.factors = {col: name for col, name in factors.items() if col in df.columns}
+        outcome_values = pd.to_numeric(df[outcome], errors="coerce").to_numpy(dtype=float)
+        self.outcome = np.where(np.isnan(outcome_values), -1, outcome_values).astype(np.int8)
+
+        self.codes, self.levels = [], []
+        for col in self.factors:
+            values = df[col].to_numpy()
+            valid = pd.notna(values)
+            codes = np.full(len(values), -1, dtype=np.int32)
+            levels, codes[valid] = np.unique(values[valid], return_inverse=True)
+            self.codes.append(codes)
+            self.levels.append(levels)
+        self.codes = np.vstack(self.codes) if self.codes else np.empty((0, len(df)), dtype=np.int32)
+        sizes = np.array([len(levels) for levels in self.levels], dtype=np.int64)
+        self.kmax = int(sizes.max()) if len(sizes) else 0
+        self.n_rows = len(df)
+
+    def tables(self, rows=None):
+        """Contingency tables for every factor, shape (factors, kmax, 2)."""
+        codes = self.codes if rows is None else self.codes[:, rows]
+        outcome = self.outcome if rows is None else self.outcome[rows]
+        n_factors = codes.shape[0]
+        keep = (codes >= 0) & (outcome >= 0)
+        offsets = (np.arange(n_factors, dtype=np.int64) * self.kmax * 2)[:, None]
+        keys = offsets + codes.astype(np.int64) * 2 + outcome
+        counts = np.bincount(keys[keep], minlength=n_factors * self.kmax * 2)
+        return counts.reshape(n_factors, self.kmax, 2).astype(np.float64)
+
+    def importance(self, rows=None):
+        from scipy.stats import chi2 as chi2_dist
+
+        observed = self.tables(rows)
+        row_tot = observed.sum(axis=2)
+        col_tot = observed.sum(axis=1)
+        n = row_tot.sum(axis=1)
+
+        # Like pd.crosstab, only levels and outcomes that occur count
+        row_used = row_tot > 0
+        col_used = col_tot > 0
+        n_rows = row_used.sum(axis=1)
+        n_cols = col_used.sum(axis=1)
+        dof = np.where((n_rows > 0) & (n_cols > 0), (n_rows - 1) * (n_cols - 1), 0)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            expected = row_tot[:, :, None] * col_tot[:, None, :] / n[:, None, None]
+            # Yates' continuity correction for 2x2 tables, as chi2_contingency does
+            diff = expected - observed
+            yates = (dof == 1)[:, None, None]
+            corrected = np.where(yates, observed + np.sign(diff) * np.minimum(0.5, np.abs(diff)), observed)
+            cells = row_used[:, :, None] & col_used[:, None, :]
+            terms = np.where(cells, (corrected - expected) ** 2 / expected, 0.0)
+            chi2 = np.where(dof > 0, terms.sum(axis=(1, 2)), 0.0)
+            p = np.where(dof > 0, chi2_dist.sf(chi2, np.maximum(dof, 1)), 1.0)
+
+            min_dim = np.minimum(n_rows, n_cols) - 1
+            cramers_v = np.where(min_dim > 0, np.sqrt(chi2 / (n * np.maximum(min_dim, 1))), 0.0)
+
+            rates = np.where(row_used, observed[:, :, 1] / row_tot * 100, np.nan)
+            spread = np.nanmax(rates, axis=1, initial=-np.inf, where=row_used) \
+                - np.nanmin(rates, axis=1, initial=np.inf, where=row_used)
+
+        present = n > 0
+        importance_df = pd.DataFrame({
+            "Factor": np.array(list(self.factors.values()), dtype=object)[present],
+            "Cramers_V": cramers_v[present],
+            "Chi2": chi2[present],
+            "P_Value": p[present],
+            "Impact_Difference_%": spread[present],
+            "Significant": np.where(p[present] < 0.05, "Yes", "No"),
+        }, columns=COLUMNS)
+        return importance_df.sort_values("Impact_Difference_%", ascending=False)
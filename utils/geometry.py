@@ -0,0 +1,162 @@
+# utils/geometry.py
+import json
+import os
+import threading
+from functools import partial
+
+from utils.artifacts import available, read_bytes, read_json
+from utils.data_registry import BASE_DIR
+from utils.districts import DISTRICT_MAP
+from utils.static_files import register_file, static_url
+
+GEOJSON_PATH = os.path.join(BASE_DIR, "assets", "geoBoundaries-RWA-ADM2 (1).geojson")
+
+# Simplification tolerances in degrees (0.001 deg is roughly 110 m in Rwanda)
+TOLERANCES = {"full": 0.0, "medium": 0.001, "low": 0.005}
+DEFAULT_DETAIL = "medium"
+COORD_PRECISION = 1e-5
+# Districts closer than this (degrees, about 10 m) count as neighbours, which
+# absorbs slivers between digitized borders
+NEIGHBOUR_TOLERANCE = 1e-4
+
+_cache = {}
+_lock = threading.RLock()
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return path, st.st_mtime_ns, st.st_size
+
+
+def _cached(key, build):
+    entry = _cache.get(key)
+    if entry is None:
+        with _lock:
+            entry = _cache.get(key)
+            if entry is None:
+                entry = build()
+                _cache[key] = entry
+    return entry
+
+
+def load_districts(path=GEOJSON_PATH):
+    """Parse the ADM2 boundaries once and attach DHS district codes."""
+    def build():
+        # geopandas (with pyproj and the GDAL bindings) is only needed when
+        # there is no current build of the geometry
+        import geopandas as gpd
+
+        gdf = gpd.read_file(path)
+        if gdf.crs is None:
+            gdf = gdf.set_crs("EPSG:4326")
+        codes = {name.strip().lower(): code for code, name in DISTRICT_MAP.items()}
+        gdf["shapeName_clean"] = gdf["shapeName"].str.strip().str.lower()
+        gdf["district_code"] = gdf["shapeName_clean"].map(codes)
+        gdf = gdf[gdf["district_code"].notna()].copy()
+        gdf["district_code"] = gdf["district_code"].astype(int)
+        gdf["district_name"] = gdf["district_code"].map(DISTRICT_MAP)
+        return gdf[["district_code", "district_name", "geometry"]].reset_index(drop=True)
+
+    return _cached(("districts",) + _stamp(path), build)
+
+
+def simplify_coverage(geoms, tolerance):
+    import shapely
+
+    if tolerance <= 0:
+        return geoms
+    if hasattr(shapely, "coverage_simplify") and shapely.coverage_is_valid(geoms):
+        # Simplifies shared borders once so neighbouring districts stay gap-free
+        return shapely.coverage_simplify(geoms, tolerance)
+    return shapely.simplify(geoms, tolerance, preserve_topology=True)
+
+
+def geometry_available(path=GEOJSON_PATH):
+    return os.path.exists(path) or (path == GEOJSON_PATH and available(artifact_name()) is not None)
+
+
+def artifact_name(detail=DEFAULT_DETAIL):
+    return f"geometry/districts-{detail}.geojson"
+
+
+def district_geojson(detail=DEFAULT_DETAIL, path=GEOJSON_PATH):
+    """GeoJSON FeatureCollection keyed by district code (feature `id`)."""
+    if path == GEOJSON_PATH:
+        built = read_json(artifact_name(detail))
+        if built is not None:
+            return built
+
+    def build():
+        import shapely
+        from shapely.geometry import mapping
+
+        gdf = load_districts(path)
+        geoms = simplify_coverage(gdf.geometry.values, TOLERANCES[detail])
+        geoms = shapely.set_precision(geoms, COORD_PRECISION)
+        features = [
+            {"type": "Feature", "id": int(code), "properties": {"district_name": name},
+             "geometry": mapping(geom)}
+            for code, name, geom in zip(gdf["district_code"], gdf["district_name"], geoms)
+        ]
+        return {"type": "FeatureCollection", "features": features}
+
+    return _cached(("geojson", detail) + _stamp(path), build)
+
+
+def district_geojson_bytes(detail=DEFAULT_DETAIL, path=GEOJSON_PATH):
+    """Pre-serialized form of district_geojson, for serving as a static file."""
+    if path == GEOJSON_PATH:
+        built = read_bytes(artifact_name(detail))
+        if built is not None:
+            return built
+    return _cached(
+        ("geojson_bytes", detail) + _stamp(path),
+        lambda: json.dumps(district_geojson(detail, path), separators=(",", ":")).encode(),
+    )
+
+
+def district_neighbours(path=GEOJSON_PATH):
+    """District code -> sorted codes of the districts sharing a border with it.
+
+    Candidates come from an R-tree over the polygon bounding boxes; only
+    those within NEIGHBOUR_TOLERANCE of the polygon are kept.
+    """
+    if path == GEOJSON_PATH:
+        built = read_json("geometry/neighbours.json")
+        if built is not None:
+            return {int(code): found for code, found in built.items()}
+
+    def build():
+        import shapely
+        from rtree import index as rtree_index
+
+        gdf = load_districts(path)
+        geoms = gdf.geometry.values
+        codes = gdf["district_code"].to_numpy()
+        tree = rtree_index.Index()
+        for i, bounds in enumerate(shapely.bounds(geoms)):
+            tree.insert(i, tuple(bounds))
+        neighbours = {}
+        for i, geom in enumerate(geoms):
+            minx, miny, maxx, maxy = geom.bounds
+            pad = NEIGHBOUR_TOLERANCE
+            candidates = [j for j in tree.intersection((minx - pad, miny - pad, maxx + pad, maxy + pad)) if j != i]
+            close = shapely.dwithin(geoms[candidates], geom, NEIGHBOUR_TOLERANCE) if candidates else []
+            found = {int(codes[j]) for j, ok in zip(candidates, close) if ok}
+            neighbours.setdefault(int(codes[i]), set()).update(found)
+        return {code: sorted(found) for code, found in neighbours.items()}
+
+    return _cached(("neighbours",) + _stamp(path), build)
+
+
+for _detail in TOLERANCES:
+    register_file(f"districts-{_detail}.geojson", partial(district_geojson_bytes, _detail), "application/geo+json")
+
+
+def district_geojson_url(detail=DEFAULT_DETAIL):
+    """Versioned URL of district_geojson_bytes.
+
+    Figures reference the boundaries by this URL instead of carrying them
+    inline; plotly.js fetches them once and the browser caches them.
+    """
+    return static_url(f"districts-{detail}.geojson")
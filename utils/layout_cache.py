@@ -0,0 +1,165 @@
+# utils/layout_cache.py
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import jsonify
+from plotly.io.json import to_json_plotly
+
+from utils.normalize import normalized_version
+
+CACHE_SIZE = int(os.environ.get("NISR_LAYOUT_CACHE_SIZE", "64"))
+# Optional directory shared by all workers on a host; unset keeps entries in memory only
+CACHE_DIR = os.environ.get("NISR_LAYOUT_CACHE_DIR") or None
+DISK_SIZE = int(os.environ.get("NISR_LAYOUT_CACHE_DISK_SIZE", "512"))
+
+
+def data_version(sources):
+    """Combined registry version of the datasets a page is built from."""
+    return "|".join(normalized_version(source) for source in sources)
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+
+class LayoutCache:
+    """Bounded LRU of rendered layouts and figures per (page, filters, data version).
+
+    Values are stored as the JSON Dash would send, already decoded, so a hit
+    skips both building the component tree and converting it. Entries for a
+    page are dropped as soon as that page is requested with a new data
+    version. With `directory`, entries are also written there as JSON files
+    that every worker can read, pruned to the `disk_maxsize` most recently
+    used.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, directory=CACHE_DIR, disk_maxsize=DISK_SIZE):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.disk_maxsize = disk_maxsize
+        self._lru = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = self.evictions = self.invalidations = 0
+        self.build_ms = 0.0
+
+    @staticmethod
+    def key(page, filters=None):
+        return page, json.dumps(filters, sort_keys=True, default=str)
+
+    def _path(self, page, filters_json, version):
+        slug = page.strip("/").replace("/", "-") or "index"
+        return os.path.join(self.directory, f"{slug}-{_digest(version)}-{_digest(filters_json)}.json")
+
+    def _invalidate(self, page, version):
+        """Forget every entry of `page` built from another data version."""
+        if self._versions.get(page) == version:
+            return
+        if page in self._versions:
+            stale = [key for key in self._lru if key[0] == page]
+            for key in stale:
+                del self._lru[key]
+            self.invalidations += len(stale)
+            if self.directory:
+                slug = page.strip("/").replace("/", "-") or "index"
+                for path in glob.glob(os.path.join(self.directory, f"{slug}-*.json")):
+                    if not os.path.basename(path).startswith(f"{slug}-{_digest(version)}-"):
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+        self._versions[page] = version
+
+    def _read_disk(self, path):
+        try:
+            with open(path) as f:
+                value = json.load(f)
+            os.utime(path)
+            return value
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, path, text):
+        # Workers may build the same entry at once: write then rename atomically
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            files = glob.glob(os.path.join(self.directory, "*.json"))
+            if len(files) > self.disk_maxsize:
+                files.sort(key=lambda p: os.stat(p).st_mtime)
+                for old in files[:len(files) - self.disk_maxsize]:
+                    os.remove(old)
+        except OSError:
+            pass
+
+    def get_or_build(self, page, filters, version, build):
+        """Cached output of `build()` for this page, filters and data version."""
+        page, filters_json = key = self.key(page, filters)
+        with self._lock:
+            self._invalidate(page, version)
+            entry = self._lru.get(key)
+            if entry is not None and entry[0] == version:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        path = self._path(page, filters_json, version) if self.directory else None
+        value = self._read_disk(path) if path else None
+        if value is not None:
+            self.disk_hits += 1
+        else:
+            start = time.perf_counter()
+            text = to_json_plotly(build())
+            value = json.loads(text)
+            with self._lock:
+                self.misses += 1
+                self.build_ms += (time.perf_counter() - start) * 1000
+            if path:
+                self._write_disk(path, text)
+
+        with self._lock:
+            if self._versions.get(page) == version:
+                self._lru[key] = (version, value)
+                self._lru.move_to_end(key)
+                while len(self._lru) > self.maxsize:
+                    self._lru.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self._versions.clear()
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "lookups": lookups,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._lru),
+            "maxsize": self.maxsize,
+            "directory": self.directory,
+            "build_ms": round(self.build_ms, 1),
+            "versions": dict(self._versions),
+        }
+
+
+def register_layout_cache_route(server, cache, route="/api/layout-cache"):
+    @server.route(route)
+    def layout_cache_stats():
+        return jsonify(cache.stats())
+
+    return layout_cache_stats
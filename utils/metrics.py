@@ -0,0 +1,196 @@
+# utils/metrics.py
+import bisect
+import functools
+import os
+import threading
+import time
+
+from dash.exceptions import PreventUpdate
+from flask import Response, g, request
+
+ENABLED = os.environ.get("NISR_METRICS", "1") != "0"
+# Upper bounds of the histogram buckets (Prometheus "le"), seconds and bytes
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+CALLBACK_ROUTE = "/_dash-update-component"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense (no quantiles kept)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            yield f"{name}_bucket{_labels({**labels, 'le': bound})} {cumulative}"
+        yield f"{name}_sum{_labels(labels)} {self.sum:.6g}"
+        yield f"{name}_count{_labels(labels)} {self.count}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Metrics:
+    """Per-process latency, payload, outcome and cache figures for /metrics.
+
+    Callbacks are timed by wrapping the functions Dash dispatches to, and
+    requests by before/after_request hooks; each observation is a bisect
+    and a few additions under one lock. Under gunicorn every worker keeps
+    its own figures, so a scrape reports the worker that answered it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.callback_latency = {}
+        self.callback_bytes = {}
+        self.callback_outcomes = {}
+        self.request_latency = {}
+        self.request_status = {}
+        self._stats = {}
+
+    def observe_callback(self, name, seconds, outcome):
+        with self._lock:
+            if name not in self.callback_latency:
+                self.callback_latency[name] = Histogram(LATENCY_BUCKETS)
+            self.callback_latency[name].observe(seconds)
+            key = (name, outcome)
+            self.callback_outcomes[key] = self.callback_outcomes.get(key, 0) + 1
+
+    def observe_payload(self, name, size):
+        with self._lock:
+            if name not in self.callback_bytes:
+                self.callback_bytes[name] = Histogram(SIZE_BUCKETS)
+            self.callback_bytes[name].observe(size)
+
+    def observe_request(self, route, status, seconds):
+        with self._lock:
+            if route not in self.request_latency:
+                self.request_latency[route] = Histogram(LATENCY_BUCKETS)
+            self.request_latency[route].observe(seconds)
+            key = (route, status)
+            self.request_status[key] = self.request_status.get(key, 0) + 1
+
+    def add_stats(self, name, stats):
+        """Export the numeric fields of `stats()` (a cache's counters) as gauges."""
+        self._stats[name] = stats
+
+    def render(self):
+        """Everything in Prometheus text exposition format."""
+        out = []
+        with self._lock:
+            out += ["# HELP nisr_callback_duration_seconds Time spent in a Dash callback function.",
+                    "# TYPE nisr_callback_duration_seconds histogram"]
+            for name, histogram in sorted(self.callback_latency.items()):
+                out += histogram.lines("nisr_callback_duration_seconds", {"callback": name})
+            out += ["# HELP nisr_callback_calls_total Dash callback calls by outcome (ok, prevented, error).",
+                    "# TYPE nisr_callback_calls_total counter"]
+            for (name, outcome), count in sorted(self.callback_outcomes.items()):
+                out.append(f"nisr_callback_calls_total{_labels({'callback': name, 'outcome': outcome})} {count}")
+            out += ["# HELP nisr_callback_response_bytes Uncompressed size of callback responses.",
+                    "# TYPE nisr_callback_response_bytes histogram"]
+            for name, histogram in sorted(self.callback_bytes.items()):
+                out += histogram.lines("nisr_callback_response_bytes", {"callback": name})
+            out += ["# HELP nisr_http_request_duration_seconds Time from request to response, by route.",
+                    "# TYPE nisr_http_request_duration_seconds histogram"]
+            for route, histogram in sorted(self.request_latency.items()):
+                out += histogram.lines("nisr_http_request_duration_seconds", {"route": route})
+            out += ["# HELP nisr_http_requests_total Responses by route and status code.",
+                    "# TYPE nisr_http_requests_total counter"]
+            for (route, status), count in sorted(self.request_status.items()):
+                out.append(f"nisr_http_requests_total{_labels({'route': route, 'status': status})} {count}")
+            stats = list(self._stats.items())
+
+        gauges = {}
+        for cache, read in stats:
+            for field, value in read().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges.setdefault(field, []).append((cache, value))
+        for field, values in sorted(gauges.items()):
+            out.append(f"# TYPE nisr_cache_{field} gauge")
+            out += [f"nisr_cache_{field}{_labels({'cache': cache})} {value}" for cache, value in values]
+        return "\n".join(out) + "\n"
+
+
+def instrument_callbacks(app, metrics):
+    """Wrap every server-side callback registered so far (clientside ones never reach us)."""
+    for entry in app.callback_map.values():
+        func = entry.get("callback")
+        if func is None or getattr(func, "_timed", False):
+            continue
+        entry["callback"] = _timed(func, func.__name__, metrics)
+
+
+def _timed(func, name, metrics):
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        g.callback = name
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            result = func(*args, **kwargs)
+            outcome = "ok"
+            return result
+        except PreventUpdate:
+            outcome = "prevented"
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            g.callback_seconds = elapsed
+            metrics.observe_callback(name, elapsed, outcome)
+
+    timed._timed = True
+    return timed
+
+
+def register_metrics(app, metrics, route="/metrics"):
+    """Time requests, add Server-Timing headers and serve `route` for Prometheus.
+
+    Call after all callbacks are registered (and after register_compression,
+    so the payload sizes recorded are the uncompressed ones).
+    """
+    server = app.server
+    instrument_callbacks(app, metrics)
+
+    @server.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @server.after_request
+    def record_request(response):
+        start = g.pop("request_start", None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+        rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        metrics.observe_request(rule, response.status_code, elapsed)
+
+        timings = [f"app;dur={elapsed * 1000:.2f}"]
+        callback = g.pop("callback", None)
+        if callback is not None:
+            timings.insert(0, f'cb;desc="{callback}";dur={g.pop("callback_seconds", 0) * 1000:.2f}')
+            if rule == CALLBACK_ROUTE and not response.direct_passthrough:
+                metrics.observe_payload(callback, response.calculate_content_length() or 0)
+        response.headers.add("Server-Timing", ", ".join(timings))
+        return response
+
+    @server.route(route)
+    def prometheus_metrics():
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    return prometheus_metrics
@@ -0,0 +1,176 @@
+# utils/model_registry.py
+import datetime
+import logging
+import os
+import threading
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from flask import jsonify
+
+from utils.artifacts import available, input_hash
+from utils.compiled_model import compile_model
+from utils.data_registry import BASE_DIR, file_hash
+
+MODELS = {
+    "stunting": os.path.join(BASE_DIR, "assets", "best_stunting_model_hgb_no_impute.joblib"),
+}
+
+# Memory-map the tree arrays so forked gunicorn workers share the same pages
+MMAP = os.environ.get("NISR_MODEL_MMAP", "1") != "0"
+# Serve predictions from the verified NumPy tree evaluator when the model allows it
+COMPILE = os.environ.get("NISR_COMPILED_MODEL", "1") != "0"
+
+_entries = {}
+# name -> (artifact stamp or None if missing, error): a failed load is not
+# retried, or logged again, until the file changes
+_failures = {}
+_lock = threading.Lock()
+logger = logging.getLogger(__name__)
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def warm_up(model):
+    """Run one prediction so the first user does not pay first-call costs."""
+    features = getattr(model, "feature_names_in_", None)
+    if features is None:
+        return None
+    start = time.perf_counter()
+    model.predict_proba(pd.DataFrame([[np.nan] * len(features)], columns=features))
+    return (time.perf_counter() - start) * 1000
+
+
+def _load(name, path):
+    import sklearn
+
+    start = time.perf_counter()
+    model = joblib.load(path, mmap_mode="r" if MMAP else None)
+    load_ms = (time.perf_counter() - start) * 1000
+    digest = file_hash(path)
+    info = {
+        "name": name,
+        "path": os.path.relpath(path, BASE_DIR) if path.startswith(BASE_DIR) else path,
+        "version": digest[:12],
+        "sha256": digest,
+        "estimator": type(model).__name__,
+        "steps": [step for step, _ in getattr(model, "steps", [])],
+        "features": [str(f) for f in getattr(model, "feature_names_in_", [])],
+        "sklearn_version": sklearn.__version__,
+        "modified": datetime.datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec="seconds"),
+        "loaded_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "load_ms": round(load_ms, 1),
+        "mmap": MMAP,
+    }
+    warm_ms = warm_up(model)
+    info["warmup_ms"] = None if warm_ms is None else round(warm_ms, 1)
+
+    compiled = None
+    if COMPILE:
+        try:
+            # A build made from this exact artifact already compiled and verified it
+            built = available(f"models/{name}-compiled.joblib")
+            if built is not None and input_hash(f"model:{name}") == digest:
+                compiled = joblib.load(built)
+            else:
+                compiled = compile_model(model)
+            warm_up(compiled)
+        except Exception as e:
+            print(f"⚠️ Model '{name}' not compiled, using scikit-learn predict: {e}")
+    info["compiled"] = compiled is not None
+    return {"model": model, "compiled": compiled, "info": info}
+
+
+def _fail(name, stamp, error):
+    """Remember a failed load and log it the first time it is seen."""
+    with _lock:
+        known = _failures.get(name)
+        if known is None or known[0] != stamp:
+            _failures[name] = (stamp, error)
+            logger.error("Model '%s' unavailable: %s", name, error)
+    raise error
+
+
+def _entry(name):
+    path = MODELS.get(name, name)
+    try:
+        stamp = _stamp(path)
+    except OSError as e:
+        stamp, missing = None, e
+    failed = _failures.get(name)
+    if failed is not None and failed[0] == stamp:
+        raise failed[1]
+    if stamp is None:
+        _fail(name, None, missing)
+    entry = _entries.get(name)
+    if entry is not None and entry["stamp"] == stamp:
+        return entry
+
+    error = None
+    with _lock:
+        entry = _entries.get(name)
+        if entry is None or entry["stamp"] != stamp:
+            # New or replaced artifact: load it fully before swapping it in,
+            # so requests keep using the old model until the new one is ready
+            try:
+                entry = dict(_load(name, path), stamp=stamp)
+            except Exception as e:
+                error = e
+            else:
+                _entries[name] = entry
+                _failures.pop(name, None)
+                print(f"✅ Model '{name}' loaded (version {entry['info']['version']})")
+    if error is not None:
+        _fail(name, stamp, error)
+    return entry
+
+
+def get_model(name="stunting", compiled=False):
+    """Return the loaded model, or None if it cannot be loaded.
+
+    The artifact is loaded once per process and reloaded automatically when
+    the file is replaced on disk. With compiled=True the NumPy evaluator from
+    utils.compiled_model is returned when available (same predict_proba API).
+    """
+    try:
+        entry = _entry(name)
+        return (compiled and entry["compiled"]) or entry["model"]
+    except Exception:
+        # Logged once per artifact state by _entry
+        return None
+
+
+def model_info(name="stunting"):
+    try:
+        return dict(_entry(name)["info"])
+    except Exception as e:
+        return {"name": name, "error": str(e)}
+
+
+def model_version(name="stunting"):
+    try:
+        return _entry(name)["info"]["version"]
+    except Exception:
+        return None
+
+
+def swap_model(path, name="stunting"):
+    """Point a model name at a new artifact; it is loaded and warmed before use."""
+    entry = dict(_load(name, path), stamp=_stamp(path))
+    with _lock:
+        MODELS[name] = path
+        _entries[name] = entry
+    return entry["info"]
+
+
+def register_model_route(server, route="/api/model"):
+    @server.route(route)
+    def model_metadata():
+        return jsonify({name: model_info(name) for name in MODELS})
+
+    return model_metadata
@@ -0,0 +1,183 @@
+# utils/normalize.py
+import os
+
+import numpy as np
+import pandas as pd
+
+from utils.artifacts import available, input_hash, read_frame
+from utils.data_registry import DATASETS, dataset_version, get_dataset, resolve_path
+from utils.typed_loader import CHUNK_ROWS, NUTRITION_SCHEMA, read_typed_csv
+
+# Bump whenever normalize_frame changes output, so cached artifacts are rebuilt
+# 2: packed `indicators` column
+NORMALIZE_VERSION = 2
+
+# Anthropometric z-scores under the names used by the different extracts,
+# with the WHO plausible range for each
+ZSCORES = {
+    "haz": (("height_for_age_zscore", "height_for_age_z"), (-6, 6)),
+    "whz": (("weight_for_height_zscore", "weight_for_height_z"), (-5, 5)),
+    "waz": (("weight_for_age_zscore", "weight_for_age_z"), (-6, 5)),
+    "baz": (("bmi_for_age_zscore", "bmi_for_age_z"), (-5, 5)),
+}
+# DHS stores z-scores in hundredths and codes flagged or missing values as 9996+
+FLAG_CODE = 9990
+SCALE_DETECT = 10
+
+# Bits of the uint8 `who_flags` column: the z-score was recorded but dropped
+WHO_FLAG_BITS = {"haz": 1, "whz": 2, "waz": 4, "baz": 8}
+
+INDICATORS = {
+    "stunted": "haz",
+    "wasted": "whz",
+    "underweight": "waz",
+}
+# malnourished: any of the above, or thinness (BMI-for-age < -2) where recorded
+
+# Bits of the uint8 `indicators` column: all four indicators in one byte per child
+INDICATOR_BITS = {"stunted": 1, "wasted": 2, "underweight": 4, "malnourished": 8}
+# children_nutrition_with_district.csv always stores z-scores in hundredths
+NUTRITION_SCALE = 100
+
+
+def zscore_column(df, key):
+    """Name of the column holding a z-score (haz/whz/waz/baz) in df, or None."""
+    names, _ = ZSCORES[key]
+    return next((name for name in names if name in df.columns), None)
+
+
+def normalize_zscore(values, low, high, scale=None):
+    """Scale one z-score column to SD units and drop flagged/implausible values.
+
+    `scale` is detected from the values unless given (streamed chunks must
+    not each guess). Returns the cleaned values and a mask of
+    recorded-but-dropped entries.
+    """
+    values = pd.to_numeric(values, errors="coerce")
+    dtype = np.float32 if values.dtype == np.float32 else np.float64
+    z = values.to_numpy(dtype=dtype, na_value=np.nan, copy=True)
+    recorded = ~np.isnan(z)
+    z[z >= FLAG_CODE] = np.nan
+    if scale is None:
+        scale = 100 if np.nanmax(np.abs(z), initial=0) > SCALE_DETECT else 1
+    if scale != 1:
+        z /= scale
+    z[(z < low) | (z > high)] = np.nan
+    return z, recorded & np.isnan(z)
+
+
+def normalize_frame(df, scale=None):
+    """Scaled z-scores, WHO flags and indicator columns for one extract.
+
+    Every z-score column present is converted to SD units in place. Adds
+    `who_flags` (uint8, WHO_FLAG_BITS), the packed `indicators` column
+    (uint8, INDICATOR_BITS) and boolean stunted / wasted / underweight /
+    malnourished columns; children without a valid z-score count as not
+    having the condition, as the pages always have.
+    """
+    df = df.copy()
+    flags = np.zeros(len(df), dtype=np.uint8)
+    below = {}
+    for key, (_, (low, high)) in ZSCORES.items():
+        col = zscore_column(df, key)
+        if col is None:
+            continue
+        z, dropped = normalize_zscore(df[col], low, high, scale)
+        df[col] = z
+        flags[dropped] |= WHO_FLAG_BITS[key]
+        below[key] = z < -2
+
+    df["who_flags"] = flags
+    none = np.zeros(len(df), dtype=bool)
+    for name, key in INDICATORS.items():
+        df[name] = below.get(key, none)
+    df["malnourished"] = df["stunted"] | df["wasted"] | df["underweight"] | below.get("baz", none)
+    packed = np.zeros(len(df), dtype=np.uint8)
+    for name, bit in INDICATOR_BITS.items():
+        packed[df[name].to_numpy()] |= bit
+    df["indicators"] = packed
+    return df
+
+
+def indicator(df, name):
+    """One indicator unpacked from the `indicators` column, as a boolean array."""
+    return (df["indicators"].to_numpy() & INDICATOR_BITS[name]) > 0
+
+
+def _normalize_nutrition(chunk):
+    return normalize_frame(chunk, NUTRITION_SCALE)
+
+
+def read_nutrition_csv(path, chunksize=CHUNK_ROWS):
+    """children_nutrition_with_district.csv, normalized while it streams.
+
+    Each compact chunk is scaled, WHO-clipped and given its indicator
+    columns before the next is read, so no raw z-score frame is ever held.
+    """
+    return read_typed_csv(path, NUTRITION_SCHEMA, chunksize, transform=_normalize_nutrition)
+
+
+def _read_csv(path):
+    return normalize_frame(pd.read_csv(path))
+
+
+# Normalizing readers by source; anything else is parsed with pd.read_csv defaults
+READERS = {
+    resolve_path("children_nutrition"): read_nutrition_csv,
+}
+
+
+def _normalized_reader(source):
+    read = READERS.get(resolve_path(source), _read_csv)
+
+    def reader(path):
+        return read(path)
+
+    reader.cache_tag = f"normalized-v{NORMALIZE_VERSION}"
+    return reader
+
+
+_readers = {}
+
+
+def _reader(source):
+    path = resolve_path(source)
+    if path not in _readers:
+        _readers[path] = _normalized_reader(source)
+    return _readers[path]
+
+
+def artifact_name(source):
+    return f"data/{source}.parquet"
+
+
+def _built(source):
+    return source in DATASETS and available(artifact_name(source)) is not None
+
+
+def get_normalized(source):
+    """Normalized frame for a registry source or CSV path.
+
+    Read from the offline build (see build_artifacts) when it is current;
+    otherwise built once per source file and NORMALIZE_VERSION, then served
+    from the registry (and its columnar cache) like any other dataset.
+    """
+    if _built(source):
+        return read_frame(artifact_name(source))
+    return get_dataset(source, reader=_reader(source))
+
+
+def normalized_version(source):
+    if _built(source):
+        return f"{input_hash(source)}-n{NORMALIZE_VERSION}"
+    return f"{dataset_version(source, reader=_reader(source))}-n{NORMALIZE_VERSION}"
+
+
+def dataset_available(source):
+    return _built(source) or os.path.exists(resolve_path(source))
+
+
+def measured(df):
+    """Children with a valid height-for-age z-score."""
+    col = zscore_column(df, "haz")
+    return df[col].notna().to_numpy() if col else np.zeros(len(df), dtype=bool)
@@ -1,31 +1,21 @@
 # utils/plots.py
-import pandas as pd
-import numpy as np
 import plotly.express as px
 
-# Load & clean data
-def load_nutrition_data(csv_path):
-    df = pd.read_csv(csv_path)
-
-    # Apply WHO plausible ranges
-    df.loc[(df["height_for_age_z"] < -6) | (df["height_for_age_z"] > 6), "height_for_age_z"] = np.nan
-    df.loc[(df["weight_for_height_z"] < -5) | (df["weight_for_height_z"] > 5), "weight_for_height_z"] = np.nan
-    df.loc[(df["weight_for_age_z"] < -6) | (df["weight_for_age_z"] > 5), "weight_for_age_z"] = np.nan
+from utils.normalize import get_normalized
 
-    # Indicators
-    df["stunted"] = (df["height_for_age_z"] < -2).astype(int)
-    df["wasted"] = (df["weight_for_height_z"] < -2).astype(int)
-    df["underweight"] = (df["weight_for_age_z"] < -2).astype(int)
-    df["malnourished_any"] = ((df["stunted"] == 1) | (df["wasted"] == 1) | (df["underweight"] == 1)).astype(int)
+INDICATOR_COLUMNS = ["stunted", "wasted", "underweight", "malnourished"]
 
-    return df
+# Load & clean data: compact dtypes, z-scores scaled and WHO-cleaned, and the
+# indicators as boolean columns (see utils.normalize)
+def load_nutrition_data(csv_path):
+    return get_normalized(csv_path)
 
 # Bar chart by sex
 def malnutrition_by_sex(csv_path):
     df = load_nutrition_data(csv_path)
 
     sex_summary = (
-        df.groupby("child_sex")[["stunted", "wasted", "underweight", "malnourished_any"]]
+        df.groupby("child_sex")[INDICATOR_COLUMNS]
         .mean() * 100
     ).reset_index()
 
@@ -0,0 +1,123 @@
+# utils/prediction_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from flask import jsonify
+
+CACHE_SIZE = int(os.environ.get("NISR_PREDICTION_CACHE_SIZE", "4096"))
+CACHE_TTL = float(os.environ.get("NISR_PREDICTION_CACHE_TTL", "3600"))
+# Fill the lookup table at boot with every input row seen in df_clean (one batch call)
+PREPOPULATE = os.environ.get("NISR_PREDICTION_CACHE_PREPOPULATE", "0") == "1"
+
+
+class PredictionCache:
+    """Bounded LRU + TTL cache of stunting probabilities per feature tuple.
+
+    Keys are the exact inputs (as floats, missing as None), so a cached
+    probability is always the one the model gives for those inputs. Besides
+    the LRU part, `prepopulate` fills a fixed lookup table (never evicted)
+    for known input rows. Both are dropped when the model version changes.
+    """
+
+    def __init__(self, features, maxsize=CACHE_SIZE, ttl=CACHE_TTL):
+        self.features = list(features)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self._lru = OrderedDict()
+        self._table = {}
+        self._lock = threading.Lock()
+        self.hits = self.table_hits = self.misses = self.evictions = self.expired = 0
+
+    def normalize(self, values):
+        key = []
+        for _, value in zip(self.features, values):
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                value = np.nan
+            key.append(None if np.isnan(value) else value)
+        return tuple(key)
+
+    def _frame(self, keys):
+        rows = [[np.nan if v is None else v for v in key] for key in keys]
+        return pd.DataFrame(rows, columns=self.features, dtype=float)
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._lru.clear()
+            self._table.clear()
+            self.version = version
+
+    def predict(self, model, version, values):
+        """Probability of stunting for one child, from cache when possible."""
+        key = self.normalize(values)
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            if key in self._table:
+                self.table_hits += 1
+                return self._table[key]
+            entry = self._lru.get(key)
+            if entry is not None:
+                prob, stored = entry
+                if now - stored <= self.ttl:
+                    self._lru.move_to_end(key)
+                    self.hits += 1
+                    return prob
+                del self._lru[key]
+                self.expired += 1
+            self.misses += 1
+
+        prob = float(model.predict_proba(self._frame([key]))[0, 1])
+        with self._lock:
+            if version == self.version:
+                self._lru[key] = (prob, now)
+                self._lru.move_to_end(key)
+                while len(self._lru) > self.maxsize:
+                    self._lru.popitem(last=False)
+                    self.evictions += 1
+        return prob
+
+    def prepopulate(self, model, version, rows):
+        """Score input rows (sequences in `features` order) in one batch into the lookup table."""
+        keys = list(dict.fromkeys(self.normalize(row) for row in rows))
+        probs = model.predict_proba(self._frame(keys))[:, 1]
+        with self._lock:
+            self._check_version(version)
+            self._table.update(zip(keys, probs.astype(float).tolist()))
+        return len(keys)
+
+    def stats(self):
+        lookups = self.hits + self.table_hits + self.misses
+        return {
+            "model_version": self.version,
+            "lookups": lookups,
+            "hits": self.hits,
+            "table_hits": self.table_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.table_hits) / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expired": self.expired,
+            "lru_size": len(self._lru),
+            "lru_maxsize": self.maxsize,
+            "table_size": len(self._table),
+            "ttl_seconds": self.ttl,
+        }
+
+
+def rows_from_data(df, features):
+    """Distinct input rows present in the data, e.g. df_clean's children."""
+    return df[features].drop_duplicates().itertuples(index=False, name=None)
+
+
+def register_cache_route(server, cache, route="/api/prediction-cache"):
+    @server.route(route)
+    def prediction_cache_stats():
+        return jsonify(cache.stats())
+
+    return prediction_cache_stats
@@ -0,0 +1,362 @@
+# utils/query_index.py
+import difflib
+import re
+import threading
+
+import numpy as np
+
+from utils.cube import AGE_BANDS, INDICATORS, UNKNOWN_AGE, get_cube
+from utils.districts import DISTRICT_MAP, REGION_MAP
+from utils.survey import get_estimator
+
+INDICATOR_LABELS = {
+    "stunted": "Stunting",
+    "wasted": "Wasting",
+    "underweight": "Underweight",
+    "malnourished": "Any malnutrition",
+}
+SEX_LABELS = {1: "boys", 2: "girls"}
+WEALTH_LABELS = {1: "poorest", 2: "poorer", 3: "middle", 4: "richer", 5: "richest"}
+DIMENSION_LABELS = {"district": "district", "region": "region", "sex": "sex",
+                    "age_band": "age (months)", "wealth": "wealth quintile"}
+
+# Indicator of questions about nutrition in general: every indicator at once
+ALL_INDICATORS = "all"
+
+# Vocabulary of the inverted keyword index: term -> (kind, value). Only
+# unambiguous words: a question is answered from the index only when it
+# names an indicator or a grouping (see parse)
+TERMS = {
+    **{word: ("indicator", "stunted") for word in ("stunting", "stunted")},
+    **{word: ("indicator", "wasted") for word in ("wasting", "wasted")},
+    **{word: ("indicator", "underweight") for word in ("underweight",)},
+    **{word: ("indicator", "malnourished") for word in ("malnutrition", "malnourished", "undernutrition")},
+    **{word: ("indicator", ALL_INDICATORS) for word in ("nutrition", "indicators")},
+    **{word: ("sex", 1) for word in ("boy", "boys", "male", "males", "son", "sons")},
+    **{word: ("sex", 2) for word in ("girl", "girls", "female", "females", "daughter", "daughters")},
+    **{word: ("wealth", code) for code, word in WEALTH_LABELS.items()},
+    "poor": ("wealth", (1, 2)), "rich": ("wealth", (4, 5)), "wealthy": ("wealth", (4, 5)),
+    "kigali": ("region", 1),
+    "south": ("region", 2), "southern": ("region", 2),
+    "west": ("region", 3), "western": ("region", 3),
+    "north": ("region", 4), "northern": ("region", 4),
+    "east": ("region", 5), "eastern": ("region", 5),
+    "infant": ("age", (0, 11)), "infants": ("age", (0, 11)),
+    "toddler": ("age", (12, 35)), "toddlers": ("age", (12, 35)),
+    **{word: ("group", "district") for word in ("districts",)},
+    **{word: ("group", "region") for word in ("regions", "provinces")},
+    **{word: ("rank", "desc") for word in ("top", "highest", "worst")},
+    **{word: ("rank", "asc") for word in ("bottom", "lowest", "best")},
+}
+# "by X", "per X", "across X" ask for a breakdown along X
+GROUP_AFTER = {"by", "per", "across", "each", "every"}
+GROUP_WORDS = {"district": "district", "districts": "district", "region": "region", "regions": "region",
+               "province": "region", "provinces": "region", "sex": "sex", "gender": "sex",
+               "age": "age_band", "ages": "age_band", "wealth": "wealth", "quintile": "wealth",
+               "quintiles": "wealth", "income": "wealth"}
+# Words never worth a fuzzy match
+STOPWORDS = {
+    "what", "whats", "which", "where", "show", "tell", "give", "list", "rate", "rates", "the", "and",
+    "for", "among", "amongst", "with", "from", "that", "this", "there", "their", "about", "many",
+    "much", "percent", "percentage", "prevalence", "level", "levels", "children", "child", "kids",
+    "month", "months", "year", "years", "old", "under", "below", "over", "above", "than", "between",
+    "compare", "please", "how", "are", "is", "in", "of", "to", "me", "a", "an",
+}
+NUMBER_WORDS = {"one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+                "eight": 8, "nine": 9, "ten": 10}
+
+TOKEN = re.compile(r"[a-z]+|\d+")
+AGE_RANGE = re.compile(r"(\d+)\s*(?:-|–|—|to|and)\s*(\d+)\s*(years?|yrs?|y\b)?")
+AGE_UNDER = re.compile(r"(?:under|below|younger than|less than)\s+(\d+|" + "|".join(NUMBER_WORDS) + r")\s*(years?|yrs?|months?)?")
+TOP_N = re.compile(r"(?:top|bottom|highest|lowest|worst|best)\s+(\d+|" + "|".join(NUMBER_WORDS) + r")\b")
+BAND_RANGES = [(int(lo), int(hi)) for lo, hi in (band.split("-") for band in AGE_BANDS)]
+DEFAULT_LIMIT = 5
+SMALL_SAMPLE = 30
+
+
+def age_bands(low, high):
+    """AGE_BANDS inside [low, high] months, or those overlapping it if none fit."""
+    inside = [band for band, (lo, hi) in zip(AGE_BANDS, BAND_RANGES) if lo >= low and hi <= high]
+    return inside or [band for band, (lo, hi) in zip(AGE_BANDS, BAND_RANGES) if lo <= high and hi >= low]
+
+
+class KeywordIndex:
+    """Inverted index from words and two-word phrases to (kind, value) matches.
+
+    Words match a term exactly or as its plural ("toilets"). Only terms of
+    `fuzzy_kinds` (place names) are also matched approximately: an unknown
+    word of FUZZY_MIN_LENGTH letters or more falls back to the closest such
+    term of that length (difflib, cached), so "Musanzi" still finds
+    Musanze but "weather" does not find "water".
+    """
+
+    FUZZY_CACHE_SIZE = 4096
+    FUZZY_MIN_LENGTH = 6
+    FUZZY_CUTOFF = 0.85
+
+    def __init__(self, terms, fuzzy_kinds=()):
+        self.terms = {}
+        self.fuzzy_kinds = frozenset(fuzzy_kinds)
+        self._fuzzy_cache = {}
+        for term, match in terms.items():
+            self.add(term, *match)
+
+    def add(self, term, kind, value):
+        self.terms[term.lower()] = (kind, value)
+        self._words = [t for t, (k, _) in self.terms.items()
+                       if k in self.fuzzy_kinds and " " not in t and len(t) >= self.FUZZY_MIN_LENGTH]
+        self._fuzzy_cache.clear()
+
+    def _fuzzy(self, word):
+        if word not in self._fuzzy_cache:
+            if len(self._fuzzy_cache) >= self.FUZZY_CACHE_SIZE:
+                self._fuzzy_cache.clear()
+            close = difflib.get_close_matches(word, self._words, n=1, cutoff=self.FUZZY_CUTOFF)
+            self._fuzzy_cache[word] = close[0] if close else None
+        return self._fuzzy_cache[word]
+
+    def match(self, words):
+        """(kind, value, position) for every recognised term, phrases first."""
+        found, used = [], set()
+        for i in range(len(words) - 1):
+            phrase = f"{words[i]} {words[i + 1]}"
+            if phrase in self.terms:
+                found.append((*self.terms[phrase], i))
+                used.update((i, i + 1))
+        for i, word in enumerate(words):
+            if i in used:
+                continue
+            term = word if word in self.terms else None
+            if term is None and word.endswith("s") and word[:-1] in self.terms:
+                term = word[:-1]
+            if (term is None and self._words and len(word) >= self.FUZZY_MIN_LENGTH
+                    and word not in STOPWORDS and word not in GROUP_WORDS):
+                term = self._fuzzy(word)
+            if term is not None:
+                found.append((*self.terms[term], i))
+        return sorted(found, key=lambda item: item[2])
+
+
+def parse(text, keywords):
+    """Structured query from a question, or None if it is not about the data.
+
+    Returns {"indicator", "filters": {dim: [levels]}, "group", "rank", "limit"}.
+    """
+    text = text.lower()
+    words = TOKEN.findall(text)
+    query = {"indicator": None, "filters": {}, "group": None, "rank": None, "limit": None}
+    matches = keywords.match(words)
+
+    for kind, value, _ in matches:
+        if kind == "indicator":
+            query["indicator"] = query["indicator"] or value
+        elif kind in ("district", "region", "sex", "wealth"):
+            values = value if isinstance(value, tuple) else (value,)
+            query["filters"].setdefault(kind, []).extend(v for v in values if v not in query["filters"].get(kind, []))
+        elif kind == "age":
+            query["filters"]["age_band"] = age_bands(*value)
+        elif kind == "group":
+            query["group"] = value
+        elif kind == "rank":
+            query["rank"] = value
+
+    for i, word in enumerate(words[:-1]):
+        if word in GROUP_AFTER and words[i + 1] in GROUP_WORDS:
+            query["group"] = GROUP_WORDS[words[i + 1]]
+
+    span = AGE_RANGE.search(text)
+    under = AGE_UNDER.search(text)
+    if span:
+        low, high = int(span.group(1)), int(span.group(2))
+        if span.group(3):
+            # "1-2 years" runs from month 12 to the end of the second year
+            low, high = low * 12, (high + 1) * 12 - 1
+        query["filters"]["age_band"] = age_bands(low, high)
+    elif under:
+        amount = NUMBER_WORDS.get(under.group(1)) or int(under.group(1))
+        scale = 1 if (under.group(2) or "").startswith("month") else 12
+        query["filters"]["age_band"] = age_bands(0, amount * scale - 1)
+
+    top = TOP_N.search(text)
+    if top:
+        query["limit"] = NUMBER_WORDS.get(top.group(1)) or int(top.group(1))
+
+    # Place names, sexes or rank words alone ("best wishes") are not a question
+    if not (query["indicator"] or query["group"]):
+        return None
+    # A grouping dimension that is also filtered to one level is just a filter
+    if query["group"] and len(query["filters"].get(query["group"], [])) == 1:
+        query["group"] = None
+    if query["rank"] and query["group"] is None:
+        query["group"] = "district"
+    return query
+
+
+class QueryIndex:
+    """Every indicator tally precomputed over all filter combinations.
+
+    Each cube measure gets one extra "all" position on every axis, so any
+    combination of single-level or total filters is one array element, and
+    multi-level filters (two districts, the 0-23 month bands) sum a handful
+    of elements. Rates are survey-weighted among measured children, as on
+    the pages; single-dimension answers also carry the design-based 95% CI.
+    """
+
+    MEASURES = ("measured", "measured_weight") + tuple(f"{name}_weight" for name in INDICATORS)
+
+    def __init__(self, cube, source="nisr"):
+        self.version = cube.version
+        self.source = source
+        self.dims = list(cube.dims)
+        self.levels = {dim: list(np.asarray(cube.levels[dim]).tolist()) for dim in self.dims}
+        self.arrays = {}
+        for name in self.MEASURES:
+            values = cube.measures[name].astype(np.float64)
+            for axis in range(values.ndim):
+                values = np.concatenate([values, values.sum(axis=axis, keepdims=True)], axis=axis)
+            self.arrays[name] = values
+        self.keywords = KeywordIndex(TERMS, fuzzy_kinds=("district",))
+        for code, name in DISTRICT_MAP.items():
+            if code in self.levels["district"]:
+                self.keywords.add(name, "district", code)
+        for code, name in REGION_MAP.items():
+            self.keywords.add(name, "region", code)
+
+    def _positions(self, filters, keep=None):
+        """Index arrays (np.ix_) for filters; `keep` spans every level of one dim."""
+        positions = []
+        for dim in self.dims:
+            levels = self.levels[dim]
+            if dim == keep:
+                positions.append(list(range(len(levels))))
+            elif filters.get(dim):
+                positions.append([levels.index(v) for v in filters[dim] if v in levels] or [len(levels)])
+            else:
+                positions.append([len(levels)])
+        return np.ix_(*positions)
+
+    def lookup(self, indicator, filters=None, by=None):
+        """(rate %, children measured) overall, or per level of `by`."""
+        filters = filters or {}
+        if by is None:
+            selection = self._positions(filters)
+            tally = self.arrays[f"{indicator}_weight"][selection].sum()
+            total = self.arrays["measured_weight"][selection].sum()
+            n = int(self.arrays["measured"][selection].sum())
+            return (tally / total * 100 if total else np.nan), n
+        selection = self._positions(filters, keep=by)
+        axes = tuple(i for i, dim in enumerate(self.dims) if dim != by)
+        tally = self.arrays[f"{indicator}_weight"][selection].sum(axis=axes)
+        total = self.arrays["measured_weight"][selection].sum(axis=axes)
+        n = self.arrays["measured"][selection].sum(axis=axes)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = tally / total * 100
+        return [(level, rate, int(count)) for level, rate, count in zip(self.levels[by], rates, n) if count > 0]
+
+    def confidence_interval(self, indicator, filters):
+        """Design-based CI when the query is national or one level of one dimension."""
+        active = {dim: values for dim, values in filters.items() if values}
+        if len(active) > 1 or any(len(values) > 1 for values in active.values()):
+            return None
+        estimator = get_estimator(self.source)
+        if not active:
+            row = estimator.estimate(indicator).iloc[0]
+        else:
+            (dim, (value,)), = active.items()
+            table = estimator.estimate(indicator, by=dim)
+            if value not in table.index:
+                return None
+            row = table.loc[value]
+        return float(row["ci_low"]), float(row["ci_high"])
+
+    def answer(self, text):
+        """Reply to a data question, or None if the text is not one."""
+        query = parse(text, self.keywords)
+        return None if query is None else self.format(query)
+
+    def format(self, query):
+        filters, group = query["filters"], query["group"]
+        scope = describe(filters)
+        if query["indicator"] == ALL_INDICATORS and group is None:
+            lines = []
+            for indicator in INDICATORS:
+                rate, n = self.lookup(indicator, filters)
+                lines.append(f"• {INDICATOR_LABELS[indicator]}: {rate:.1f}%")
+            if n == 0:
+                return f"No children in the survey match {scope}."
+            return f"Malnutrition {scope} ({n:,} children measured):\n" + "\n".join(lines) + sample_note(n)
+
+        indicator = {None: "stunted", ALL_INDICATORS: "malnourished"}.get(query["indicator"], query["indicator"])
+        label = INDICATOR_LABELS[indicator]
+        if group is None:
+            rate, n = self.lookup(indicator, filters)
+            if n == 0:
+                return f"No children in the survey match {scope}."
+            ci = self.confidence_interval(indicator, filters)
+            ci_text = f" (95% CI {ci[0]:.1f}–{ci[1]:.1f}%)" if ci else ""
+            return f"{label} {scope}: {rate:.1f}%{ci_text} of {n:,} children measured." + sample_note(n)
+
+        rows = self.lookup(indicator, filters, by=group)
+        if not rows:
+            return f"No children in the survey match {scope}."
+        if query["rank"]:
+            rows.sort(key=lambda row: row[1], reverse=query["rank"] == "desc")
+            rows = rows[:query["limit"] or DEFAULT_LIMIT]
+            title = f"{'Highest' if query['rank'] == 'desc' else 'Lowest'} {label.lower()} by {DIMENSION_LABELS[group]}"
+        else:
+            title = f"{label} by {DIMENSION_LABELS[group]}"
+        title += f" {scope}" if filters else ""
+        lines = [f"{i}. {level_name(group, level)}: {rate:.1f}% (n={n:,})"
+                 for i, (level, rate, n) in enumerate(rows, 1)]
+        return title + ":\n" + "\n".join(lines)
+
+
+def level_name(dim, level):
+    if dim == "district":
+        return DISTRICT_MAP.get(level, str(level))
+    if dim == "region":
+        return REGION_MAP.get(level, str(level))
+    if dim == "sex":
+        return SEX_LABELS.get(level, str(level)).capitalize()
+    if dim == "wealth":
+        return WEALTH_LABELS.get(level, str(level)).capitalize()
+    if level == UNKNOWN_AGE:
+        return "Age not recorded"
+    return f"{level} months"
+
+
+def describe(filters):
+    """Human wording of the filters, e.g. "among girls 12-23 months in Musanze"."""
+    who = []
+    if filters.get("wealth"):
+        who.append(" and ".join(WEALTH_LABELS[w] for w in filters["wealth"]))
+    who.append(" and ".join(SEX_LABELS[s] for s in filters["sex"]) if filters.get("sex") else "children")
+    if filters.get("age_band"):
+        bands = filters["age_band"]
+        who.append(f"{bands[0].split('-')[0]}-{bands[-1].split('-')[1]} months")
+    text = "among " + " ".join(who) if len(who) > 1 or filters.get("sex") else ""
+    places = [DISTRICT_MAP.get(d, str(d)) for d in filters.get("district", [])]
+    places += [REGION_MAP.get(r, str(r)) for r in filters.get("region", [])]
+    where = f"in {' and '.join(places)}" if places else "in Rwanda"
+    return f"{text} {where}".strip()
+
+
+def sample_note(n):
+    return f"\n(Small sample: fewer than {SMALL_SAMPLE} children, treat with caution.)" if n < SMALL_SAMPLE else ""
+
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def get_query_index(source="nisr"):
+    """Return the query index for a registry source, rebuilt when its cube changes."""
+    cube = get_cube(source)
+    index = _indexes.get(source)
+    if index is None or index.version != cube.version:
+        with _lock:
+            index = _indexes.get(source)
+            if index is None or index.version != cube.version:
+                index = QueryIndex(cube, source)
+                _indexes[source] = index
+    return index
@@ -0,0 +1,45 @@
+# utils/row_index.py
+import numpy as np
+import pandas as pd
+
+
+class RowIndex:
+    """Sorted row positions for every value of a set of filter columns.
+
+    Built once per dataset. `select` unions the positions of the chosen
+    values within a column and intersects across columns, so filtering
+    never scans or copies the frame. `None` means "all rows".
+    """
+
+    def __init__(self, columns):
+        # columns: {filter name: array of per-row values}
+        self.positions = {}
+        self.n_rows = None
+        for name, values in columns.items():
+            values = np.asarray(values)
+            self.n_rows = len(values)
+            valid = pd.notna(values)
+            order = np.argsort(values[valid], kind="stable")
+            rows = np.flatnonzero(valid)[order].astype(np.int32)
+            levels, starts = np.unique(values[valid][order], return_index=True)
+            self.positions[name] = {
+                level.item() if hasattr(level, "item") else level: np.sort(part)
+                for level, part in zip(levels, np.split(rows, starts[1:]))
+            }
+
+    def levels(self, name):
+        return list(self.positions[name])
+
+    def select(self, **filters):
+        selected = None
+        for name, values in filters.items():
+            if values is None or (not np.isscalar(values) and len(values) == 0):
+                continue
+            if np.isscalar(values):
+                values = [values]
+            index = self.positions[name]
+            parts = [index[v] for v in values if v in index]
+            rows = np.sort(np.concatenate(parts)) if len(parts) > 1 else (
+                parts[0] if parts else np.empty(0, dtype=np.int32))
+            selected = rows if selected is None else np.intersect1d(selected, rows, assume_unique=True)
+        return selected
@@ -0,0 +1,88 @@
+# utils/small_area.py
+import numpy as np
+import pandas as pd
+
+from utils.geometry import district_neighbours
+from utils.survey import estimate
+
+# Map modes: the survey estimate, or shrunk toward one of two prior means
+MODES = {
+    "raw": "Survey estimate",
+    "neighbours": "Smoothed toward neighbours",
+    "region": "Smoothed toward region",
+}
+
+
+def neighbour_weights(codes, neighbours):
+    """Row-normalised adjacency matrix over `codes`; rows without neighbours are zero."""
+    position = {code: i for i, code in enumerate(codes)}
+    W = np.zeros((len(codes), len(codes)))
+    for code, adjacent in neighbours.items():
+        if code not in position:
+            continue
+        cols = [position[c] for c in adjacent if c in position]
+        W[position[code], cols] = 1.0
+    totals = W.sum(axis=1, keepdims=True)
+    return np.divide(W, totals, out=np.zeros_like(W), where=totals > 0)
+
+
+def shrink(rate, variance, prior):
+    """Empirical-Bayes (Fay-Herriot) shrinkage of direct estimates toward `prior`.
+
+    The between-area variance A is a method-of-moments estimate, so every
+    area gets weight B = v / (v + A) on its prior. Works on the last axis,
+    so a stack of selections (one row each) is smoothed in one call.
+    """
+    rate, variance, prior = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64) for a in (rate, variance, prior)))
+    between = np.maximum(np.nanmean((rate - prior) ** 2 - variance, axis=-1, keepdims=True), 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weight = np.where(variance + between > 0, variance / (variance + between), 0.0)
+    smoothed = (1 - weight) * rate + weight * prior
+    return smoothed, weight, np.sqrt((1 - weight) * variance)
+
+
+def smooth_district_rates(estimates, mode="neighbours", region_rates=None, neighbours=None):
+    """Add smoothed rates to district survey estimates (rate/se/n in percent).
+
+    Sampling variances are floored at the binomial variance around the prior,
+    so districts where every sampled child was (or was not) stunted, which
+    get a zero SE, still shrink. Districts without a neighbour in the
+    boundaries fall back to their region's rate.
+    """
+    result = estimates.copy()
+    codes = result.index.to_numpy()
+    rate = result["rate"].to_numpy() / 100
+    # District codes carry their province in the tens digit
+    region_prior = pd.Series(region_rates).reindex(codes // 10).to_numpy() / 100
+
+    if mode == "neighbours":
+        W = neighbour_weights(codes, neighbours)
+        prior = np.where(W.sum(axis=1) > 0, W @ rate, region_prior)
+    elif mode == "region":
+        prior = region_prior
+    else:
+        raise ValueError(f"Unknown smoothing mode: {mode}")
+
+    variance = np.maximum((result["se"].to_numpy() / 100) ** 2,
+                          prior * (1 - prior) / np.maximum(result["n"].to_numpy(), 1))
+    smoothed, weight, se = shrink(rate, variance, prior)
+    result["raw_rate"] = result["rate"]
+    result["prior"] = prior * 100
+    result["shrinkage"] = weight
+    result["rate"] = smoothed * 100
+    result["se"] = se * 100
+    result["ci_low"] = np.clip(smoothed - 1.96 * se, 0, 1) * 100
+    result["ci_high"] = np.clip(smoothed + 1.96 * se, 0, 1) * 100
+    return result
+
+
+def district_rates(indicator="stunted", mode="raw", source="nisr"):
+    """District estimates for a map mode (see MODES), indexed by district code."""
+    estimates = estimate(indicator, by="district", source=source)
+    if mode == "raw":
+        result = estimates.copy()
+        result["raw_rate"] = result["rate"]
+        return result
+    region_rates = estimate(indicator, by="region", source=source)["rate"]
+    neighbours = district_neighbours() if mode == "neighbours" else None
+    return smooth_district_rates(estimates, mode, region_rates, neighbours)
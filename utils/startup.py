@@ -0,0 +1,142 @@
+# utils/startup.py
+import os
+import sys
+import threading
+import time
+
+# NISR_PROFILE_STARTUP=1 prints where cold-start time goes: imports per
+# package and module, then each init and warm-up step
+PROFILE = os.environ.get("NISR_PROFILE_STARTUP", "0") == "1"
+# Build data, models and pages in the background once the app is imported
+WARM_UP = os.environ.get("NISR_WARM_UP", "1") != "0"
+TOP_N = int(os.environ.get("NISR_PROFILE_TOP", "15"))
+
+_phases = []
+_last = [time.perf_counter()]
+_local = threading.local()
+
+
+class ImportTimer:
+    """Meta-path finder that times every module body as it executes.
+
+    It finds specs through the finders behind it and wraps each loader's
+    exec_module, so self time (the module body minus its own imports) and
+    cumulative time are known per module, like `python -X importtime` but
+    switchable by environment variable under any server.
+    """
+
+    def __init__(self):
+        self.times = {}
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                self._wrap(spec.loader)
+                return spec
+        return None
+
+    def _wrap(self, loader):
+        # Builtin and frozen importers are classes shared by many modules
+        if loader is None or isinstance(loader, type) or getattr(loader, "_startup_timed", False):
+            return
+        exec_module = getattr(loader, "exec_module", None)
+        if exec_module is None:
+            return
+
+        def timed(module):
+            stack = _local.__dict__.setdefault("stack", [])
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                self.times[module.__name__] = (elapsed, elapsed - children)
+
+        try:
+            loader.exec_module = timed
+            loader._startup_timed = True
+        except AttributeError:
+            pass
+
+    def by_package(self):
+        """Self time summed per top-level package: each second counted once."""
+        totals = {}
+        for name, (_, own) in self.times.items():
+            package = name.split(".")[0]
+            totals[package] = totals.get(package, 0.0) + own
+        return totals
+
+
+_timer = ImportTimer()
+
+
+def install():
+    """Start timing imports (no-op unless profiling); call before heavy imports."""
+    if PROFILE and _timer not in sys.meta_path:
+        sys.meta_path.insert(0, _timer)
+
+
+def mark(label):
+    """Record the time since the previous mark as one init step."""
+    now = time.perf_counter()
+    _phases.append((label, now - _last[0]))
+    _last[0] = now
+
+
+def _print_phases(title, phases):
+    print(f"  {title}")
+    for label, seconds in phases:
+        print(f"    {label:<36}{seconds * 1000:9.1f} ms")
+
+
+def report():
+    """Print the import and init breakdown recorded so far."""
+    if not PROFILE:
+        return
+    total = sum(own for _, own in _timer.times.values())
+    print(f"⏱️ Startup profile: {total:.2f}s in {len(_timer.times)} module imports")
+    packages = sorted(_timer.by_package().items(), key=lambda item: -item[1])[:TOP_N]
+    _print_phases("imports by package (self time)", packages)
+    slowest = sorted(_timer.times.items(), key=lambda item: -item[1][1])[:TOP_N]
+    print("  slowest module bodies (self / cumulative)")
+    for name, (cumulative, own) in slowest:
+        print(f"    {name:<36}{own * 1000:9.1f} ms {cumulative * 1000:9.1f} ms")
+    _print_phases("init", _phases)
+
+
+def warm_up(tasks, background=True):
+    """Run (label, fn) tasks in order, in a daemon thread unless background=False.
+
+    Each task fills a cache that the first request would otherwise build.
+    A failing task is reported and skipped; the page that needs it will
+    retry on first use.
+    """
+    def run():
+        start = time.perf_counter()
+        timings = []
+        for label, task in tasks:
+            task_start = time.perf_counter()
+            try:
+                task()
+            except Exception as e:
+                print(f"⚠️ Warm-up step '{label}' failed: {e}")
+            timings.append((label, time.perf_counter() - task_start))
+        print(f"✅ Warm-up finished in {time.perf_counter() - start:.2f}s")
+        if PROFILE:
+            _print_phases("warm-up", timings)
+
+    if not WARM_UP and background:
+        return None
+    if not background:
+        run()
+        return None
+    thread = threading.Thread(target=run, name="warm-up", daemon=True)
+    thread.start()
+    return thread
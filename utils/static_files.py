@@ -0,0 +1,76 @@
+# utils/static_files.py
+import hashlib
+import io
+import os
+import threading
+
+from flask import abort, send_file
+
+ROUTE = "/static-data"
+# Versioned URLs never change content, so browsers may keep them for a year
+MAX_AGE = int(os.environ.get("NISR_STATIC_MAX_AGE", str(365 * 24 * 3600)))
+
+_files = {}
+_digests = {}
+_lock = threading.Lock()
+
+
+def register_file(name, load, mimetype):
+    """Serve `load()` (bytes, cached by the loader) under a content-hashed URL."""
+    _files[name] = (load, mimetype)
+
+
+def register_path(name, path, mimetype):
+    """Serve a file from disk, re-read when it changes."""
+    cache = {}
+
+    def load():
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        if cache.get("stamp") != stamp:
+            with open(path, "rb") as f:
+                cache["data"] = f.read()
+            cache["stamp"] = stamp
+        return cache["data"]
+
+    register_file(name, load, mimetype)
+
+
+def _current(name):
+    """Bytes and content digest of a registered file."""
+    load, mimetype = _files[name]
+    data = load()
+    with _lock:
+        cached = _digests.get(name)
+        # Loaders hand back the same object until the content changes
+        if cached is None or cached[0] is not data:
+            cached = (data, hashlib.sha256(data).hexdigest()[:16])
+            _digests[name] = cached
+    return data, cached[1], mimetype
+
+
+def static_url(name):
+    """URL of a registered file, changing whenever its content does."""
+    _, digest, _ = _current(name)
+    return f"{ROUTE}/{digest}/{name}"
+
+
+def register_static_route(server, route=ROUTE):
+    @server.route(f"{route}/<digest>/<name>")
+    def static_data(digest, name):
+        if name not in _files:
+            abort(404)
+        data, current, mimetype = _current(name)
+        # An older page may still ask for a previous version: send the
+        # current content, but only cache it until revalidated
+        fresh = digest == current
+        response = send_file(io.BytesIO(data), mimetype=mimetype, etag=current,
+                             max_age=MAX_AGE if fresh else 0, conditional=True)
+        response.cache_control.public = True
+        if fresh:
+            response.cache_control.immutable = True
+        else:
+            response.cache_control.no_cache = True
+        return response
+
+    return static_data
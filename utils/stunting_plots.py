@@ -1,10 +1,11 @@
 # utils/stunting_plots.py  (modified stunting_pie_chart)
-import pandas as pd
 import numpy as np
 import plotly.express as px
 
+from utils.normalize import get_normalized
+
 def load_stunting_data(csv_path):
-    df = pd.read_csv(csv_path)
+    df = get_normalized(csv_path)
     # ... your cleaning steps ...
     return df
 
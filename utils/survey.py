@@ -0,0 +1,205 @@
+# utils/survey.py
+import threading
+
+import numpy as np
+import pandas as pd
+
+from utils.artifacts import read_json
+from utils.cube import DIMENSIONS, INDICATORS, age_band_codes, indicator_flags, sample_weights
+from utils.normalize import get_normalized, normalized_version
+
+STRATA = "sample_strata"
+PSU = "primary_sampling_unit"
+CONFIDENCE = 0.95
+BOOTSTRAP_REPLICATES = 200
+
+ESTIMATE_COLUMNS = ["rate", "se", "ci_low", "ci_high", "n", "weighted_n"]
+
+
+class SurveyDesign:
+    """Stratified two-stage cluster design with replicate-weight variances.
+
+    Rows are reduced to weighted totals per PSU, so every replicate estimate
+    comes from one matrix product with the replicate factor matrix
+    (PSUs x replicates) instead of re-weighting every row. method="jackknife"
+    builds delete-one-PSU (JKn) replicates within strata; "bootstrap" draws
+    n_h - 1 PSUs with replacement per stratum (Rao-Wu rescaling).
+    Single-PSU strata contribute no variance.
+    """
+
+    def __init__(self, weights, strata, psu, method="jackknife",
+                 replicates=BOOTSTRAP_REPLICATES, seed=0):
+        self.weights = np.asarray(weights, dtype=np.float64)
+        strata = np.asarray(strata)
+        psu = np.asarray(psu)
+        # PSU numbers are only unique within a stratum
+        pairs, self.psu_index = np.unique(np.column_stack([strata, psu]), axis=0, return_inverse=True)
+        self.psu_index = self.psu_index.ravel()
+        self.n_psu = len(pairs)
+        stratum_of_psu = np.unique(pairs[:, 0], return_inverse=True)[1].ravel()
+        n_h = np.bincount(stratum_of_psu)[stratum_of_psu]
+        self.method = method
+        self.df = self.n_psu - len(np.unique(stratum_of_psu))
+
+        if method == "jackknife":
+            cols = np.flatnonzero(n_h > 1)
+            factors = np.ones((self.n_psu, len(cols)))
+            same = stratum_of_psu[:, None] == stratum_of_psu[cols][None, :]
+            factors[same] = (n_h[cols] / (n_h[cols] - 1))[np.nonzero(same)[1]]
+            factors[cols, np.arange(len(cols))] = 0.0
+            self.coefficients = (n_h[cols] - 1) / n_h[cols]
+        elif method == "bootstrap":
+            rng = np.random.default_rng(seed)
+            factors = np.ones((self.n_psu, replicates))
+            for h in np.unique(stratum_of_psu):
+                members = np.flatnonzero(stratum_of_psu == h)
+                if len(members) < 2:
+                    continue
+                draws = rng.integers(0, len(members), size=(len(members) - 1, replicates))
+                counts = np.zeros((len(members), replicates))
+                np.add.at(counts, (draws, np.arange(replicates)), 1)
+                factors[members] = counts * len(members) / (len(members) - 1)
+            self.coefficients = np.full(replicates, 1 / replicates)
+        else:
+            raise ValueError(f"Unknown replication method: {method}")
+        self.factors = factors
+
+    @classmethod
+    def from_frame(cls, df, **kwargs):
+        return cls(sample_weights(df), df[STRATA].to_numpy(), df[PSU].to_numpy(), **kwargs)
+
+    def _psu_totals(self, values, groups, n_groups):
+        keys = groups.astype(np.int64) * self.n_psu + self.psu_index
+        return np.bincount(keys, weights=values, minlength=n_groups * self.n_psu).reshape(n_groups, self.n_psu)
+
+    def ratio(self, y, x, groups=None, n_groups=1):
+        """Weighted ratio sum(w*y)/sum(w*x) per group, its replicates and SE."""
+        groups = np.zeros(len(self.weights), dtype=np.int64) if groups is None else groups
+        # Numerator and denominator totals stacked so one product covers both
+        psu_totals = np.vstack([
+            self._psu_totals(self.weights * y, groups, n_groups),
+            self._psu_totals(self.weights * x, groups, n_groups),
+        ])
+        full = psu_totals.sum(axis=1)
+        # Every replicate total at once: (2 groups x PSUs) @ (PSUs x replicates)
+        reps = psu_totals @ self.factors
+        with np.errstate(invalid="ignore", divide="ignore"):
+            estimate = full[:n_groups] / full[n_groups:]
+            replicates = reps[:n_groups] / reps[n_groups:]
+        variance = ((replicates - estimate[:, None]) ** 2) @ self.coefficients
+        return estimate, np.sqrt(variance)
+
+    def prevalence(self, flag, valid=None, groups=None, levels=None, rows=None, level=CONFIDENCE):
+        """Design-weighted prevalence (%) with SE and confidence interval.
+
+        `valid` marks children in the denominator (all by default), `groups`
+        holds integer group positions labelled by `levels`, and `rows`
+        restricts to a domain. Domains keep every PSU in the design, so
+        their variance reflects the sampling of the whole survey.
+        """
+        flag = np.asarray(flag, dtype=np.float64)
+        x = np.ones_like(flag) if valid is None else np.asarray(valid, dtype=np.float64)
+        if rows is not None:
+            domain = np.zeros(len(flag))
+            domain[rows] = 1.0
+            x = x * domain
+        y = flag * x
+        n_groups = 1 if groups is None else len(levels)
+
+        estimate, se = self.ratio(y, x, groups, n_groups)
+        g = np.zeros(len(flag), dtype=np.int64) if groups is None else groups
+        n = np.bincount(g, weights=x, minlength=n_groups)
+        weighted_n = np.bincount(g, weights=self.weights * x, minlength=n_groups)
+
+        # Deferred: scipy.stats takes about a second to import
+        from scipy.stats import t as t_dist
+
+        crit = t_dist.ppf(0.5 + level / 2, max(self.df, 1))
+        result = pd.DataFrame({
+            "rate": estimate * 100,
+            "se": se * 100,
+            "ci_low": np.clip(estimate - crit * se, 0, 1) * 100,
+            "ci_high": np.clip(estimate + crit * se, 0, 1) * 100,
+            "n": n.astype(int),
+            "weighted_n": weighted_n,
+        }, index=None if levels is None else pd.Index(levels), columns=ESTIMATE_COLUMNS)
+        return result[result["n"] > 0] if groups is not None else result
+
+
+def group_codes(df, by):
+    """Integer group positions and their labels for a cube dimension."""
+    if by == "age_band":
+        return age_band_codes(df[DIMENSIONS[by]])
+    values = pd.to_numeric(df[DIMENSIONS[by]], errors="coerce").fillna(-1).astype(int).to_numpy()
+    levels, codes = np.unique(values, return_inverse=True)
+    return codes, levels
+
+
+class SurveyEstimator:
+    """Design, indicator flags and group codes for one dataset version."""
+
+    def __init__(self, df, version=None, **design_kwargs):
+        self.version = version
+        self.design = SurveyDesign.from_frame(df, **design_kwargs)
+        self.flags, self.measured = indicator_flags(df)
+        self._groups = {by: group_codes(df, by) for by in DIMENSIONS}
+        self._results = {}
+
+    def estimate(self, indicator="stunted", by=None, rows=None, level=CONFIDENCE):
+        """Prevalence among children with a valid z-score, optionally `by` a dimension."""
+        cacheable = rows is None
+        key = (indicator, by, level)
+        if cacheable and key in self._results:
+            return self._results[key].copy()
+        groups, levels = self._groups[by] if by else (None, None)
+        result = self.design.prevalence(self.flags[indicator], self.measured, groups, levels, rows, level)
+        if by:
+            result.index.name = by
+        if cacheable:
+            self._results[key] = result
+        return result.copy()
+
+    def export(self, indicators=INDICATORS, level=CONFIDENCE):
+        """Every indicator x dimension estimate as JSON-ready {key: split-orient dict}."""
+        tables = {}
+        for indicator in indicators:
+            for by in (None, *DIMENSIONS):
+                result = self.estimate(indicator, by, level=level)
+                tables[f"{indicator}|{by or ''}"] = {
+                    "index": result.index.tolist(), "columns": list(result.columns), "data": result.to_numpy().tolist(),
+                }
+        return {"level": level, "tables": tables}
+
+    def load(self, exported):
+        """Seed the result cache from `export` output (e.g. an offline build)."""
+        for key, table in exported["tables"].items():
+            indicator, by = key.split("|")
+            result = pd.DataFrame(table["data"], index=table["index"], columns=table["columns"])
+            result["n"] = result["n"].astype(int)
+            if by:
+                result.index.name = by
+            self._results[(indicator, by or None, exported["level"])] = result
+
+
+_estimators = {}
+_lock = threading.Lock()
+
+
+def get_estimator(source="nisr"):
+    """Return the estimator for a registry source, rebuilt only when the data changes."""
+    version = normalized_version(source)
+    estimator = _estimators.get(source)
+    if estimator is None or estimator.version != version:
+        with _lock:
+            estimator = _estimators.get(source)
+            if estimator is None or estimator.version != version:
+                estimator = SurveyEstimator(get_normalized(source), version)
+                built = read_json(f"aggregates/estimates-{source}.json")
+                if built is not None:
+                    estimator.load(built)
+                _estimators[source] = estimator
+    return estimator
+
+
+def estimate(indicator="stunted", by=None, source="nisr", rows=None, level=CONFIDENCE):
+    return get_estimator(source).estimate(indicator, by, rows, level)
@@ -0,0 +1,40 @@
+# utils/sweep.py
+import time
+
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = 200
+
+
+def sweep_values(df, feature, points):
+    """Values to try for a feature: its observed levels when there are few of
+    them, otherwise an even grid between the 1st and 99th percentiles."""
+    observed = df[feature].dropna()
+    levels = np.sort(observed.unique())
+    if len(levels) <= points:
+        return levels.astype(float)
+    lo, hi = np.percentile(observed, [1, 99])
+    return np.linspace(lo, hi, points)
+
+
+def run_sweep(model, features, base, x_values, x, y_values=None, y=None):
+    """Score `base` with x (and optionally y) varied over a grid in one call.
+
+    Returns (probabilities, elapsed_seconds); probabilities has shape
+    (len(x_values),) or (len(y_values), len(x_values)).
+    """
+    start = time.perf_counter()
+    base = pd.to_numeric(pd.Series(list(base), index=features), errors="coerce").to_numpy(dtype=float)
+    if y is None:
+        grid = np.tile(base, (len(x_values), 1))
+        grid[:, features.index(x)] = x_values
+    else:
+        xx, yy = np.meshgrid(x_values, y_values)
+        grid = np.tile(base, (xx.size, 1))
+        grid[:, features.index(x)] = xx.ravel()
+        grid[:, features.index(y)] = yy.ravel()
+    probs = model.predict_proba(pd.DataFrame(grid, columns=features))[:, 1]
+    if y is not None:
+        probs = probs.reshape(len(y_values), len(x_values))
+    return probs, time.perf_counter() - start
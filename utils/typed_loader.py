@@ -0,0 +1,86 @@
+# utils/typed_loader.py
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+CHUNK_ROWS = int(os.environ.get("NISR_LOADER_CHUNK_ROWS", "50000"))
+
+# Column dtypes for children_nutrition_with_district.csv. Nullable dtypes
+# (Int*, boolean) are parsed as float32 and converted chunk by chunk.
+NUTRITION_SCHEMA = {
+    "case_id": "category",
+    "birth_index": "int8",
+    "cluster_id": "int16",
+    "household_id": "int8",
+    "respondent_line": "int8",
+    "district_code": "int8",
+    "province": "int8",
+    "urban_rural": "int8",
+    "birth_year": "int16",
+    "birth_date_cmc": "int16",
+    "child_sex": "int8",
+    "child_alive": "bool",
+    "age_at_death": "Int16",
+    "age_months": "Int8",
+    "height_for_age_z": "float32",
+    "weight_for_age_z": "float32",
+    "weight_for_height_z": "float32",
+    "vacc_bcg": "boolean",
+    "vacc_dpt1": "boolean",
+    "vacc_polio1": "boolean",
+    "vacc_polio3": "boolean",
+    "vacc_measles": "boolean",
+    "mother_age": "int8",
+    "mother_education": "int8",
+    "wealth_index": "int8",
+    "wealth_index_score": "int32",
+    "drinking_water_source": "int8",
+    "toilet_type": "int8",
+    "district_name": "category",
+}
+
+
+def _parse_dtype(dtype):
+    if dtype == "bool":
+        return "int8"
+    if dtype == "boolean" or dtype[0].isupper():
+        return "float32"
+    return dtype
+
+
+def _cast(chunk, schema):
+    for col, dtype in schema.items():
+        if col not in chunk.columns or dtype == "category":
+            continue
+        if dtype == "boolean":
+            values = chunk[col]
+            chunk[col] = (values == 1).astype("boolean").where(values.notna())
+        else:
+            chunk[col] = chunk[col].astype(dtype)
+    return chunk
+
+
+def read_typed_csv(path, schema, chunksize=CHUNK_ROWS, transform=None):
+    """Stream a CSV into compact dtypes chunk by chunk.
+
+    Only the compact chunks are kept in memory, never the default-dtype
+    frame. `transform`, if given, runs on each cast chunk before it is
+    kept (utils.normalize scales, clips and packs indicators here).
+    Categorical columns are merged across chunks at the end.
+    """
+    dtypes = {col: _parse_dtype(dtype) for col, dtype in schema.items()}
+    transform = transform or (lambda chunk: chunk)
+    chunks = []
+    for chunk in pd.read_csv(path, dtype=dtypes, chunksize=chunksize):
+        chunks.append(transform(_cast(chunk, schema)))
+
+    if not chunks:
+        return transform(pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in schema.items()}))
+    categoricals = [col for col, dtype in schema.items() if dtype == "category" and col in chunks[0].columns]
+    merged = {col: union_categoricals([c[col] for c in chunks]) for col in categoricals}
+    df = pd.concat([c.drop(columns=categoricals) for c in chunks], ignore_index=True)
+    for col in categoricals:
+        df[col] = pd.Categorical(merged[col])
+    return df[[col for col in chunks[0].columns]]
+